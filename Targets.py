@@ -1,10 +1,18 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import uuid
-from datetime import datetime
-from snowflake.snowpark import Session
-from snowflake.snowpark.context import get_active_session
+from components.appointments import EDITABLE_COLUMNS, add_appointment, get_appointment_store, save_appointment_patches
+from components.diff import column_patches
+from components.images import inline_pictures
+from components.markets import sync_markets
+from components.metrics import measured_rerun, rendering
+from components.normalize import VALID_TYPES, normalize_closer_rows
+from components.parallel import gather
+from components.schema import MARKETS_SCHEMA
+from components.session import query_typed
+from components.snapshots import cached_snapshot
+from components.users import get_user_directory
+from components.versions import bump, version
 
 st.set_page_config(
     page_title="Appointment Dashboard",
@@ -25,420 +33,220 @@ hide_streamlit_style = """
 """
 st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 
-def create_snowflake_session():
-    connection_parameters = {
-        "account": st.secrets["snowflake"]["account"],
-        "user": st.secrets["snowflake"]["user"],
-        "password": st.secrets["snowflake"]["password"],
-        "role": st.secrets["snowflake"]["role"],
-        "warehouse": st.secrets["snowflake"]["warehouse"],
-        "database": st.secrets["snowflake"]["database"],
-        "schema": st.secrets["snowflake"]["schema"],
-    }
-    return Session.builder.configs(connection_parameters).create()
-
-session = None
-
-try:
-    session = get_active_session()
-    print("Got active session")
-except:
-    session = create_snowflake_session()
-
-
-if st.session_state.get('data_updated', False):
-    st.cache_data.clear()
-    st.session_state['data_updated'] = False
-
-@st.cache_data(show_spinner=False)
-def get_users():
-    users_query = """
-        SELECT DISTINCT "user.name" FULL_NAME, "team_members.user_id" SALESFORCE_ID
-        FROM operational.salesforce.vw_team_members_flattened
-        WHERE "user.term_date" IS NULL
-    """
-    return session.sql(users_query).to_pandas()
+# Markets can change from other servers or straight in Snowflake, so the
+# cached frame is reloaded in the background once it is this old (seconds)
+MARKETS_MAX_AGE = 60
 
-@st.cache_data(show_spinner=False)
-def get_market():
+def get_market(markets_version):
     market_query = """
         SELECT MARKET, MARKET_GROUP, RANK, NOTES
         FROM raw.snowflake.lm_markets 
     """
-    return session.sql(market_query).to_pandas()
-
-@st.cache_data(show_spinner=False)
-def get_profile_pictures():
-    profile_picture_query = """
-        SELECT "user.name" FULL_NAME, "user.picture_link" PROFILE_PICTURE
-        FROM operational.salesforce.vw_team_members_flattened
-        WHERE "user.term_date" IS NULL
-    """
-    return session.sql(profile_picture_query).to_pandas()
+    return cached_snapshot('markets', lambda: query_typed(market_query, MARKETS_SCHEMA, tag="targets"), markets_version, max_age=MARKETS_MAX_AGE)
 
-@st.cache_data(show_spinner=False)
 def get_appointments():
-    appointments_query = """
-        SELECT * FROM raw.snowflake.lm_appointments
-    """
-    df = session.sql(appointments_query).to_pandas()
+    return get_appointment_store().load(tag="targets")
 
-    if "IS_DELETED" in df.columns:
-        df["IS_DELETED"] = df["IS_DELETED"].astype(bool)
 
-    # Filter out rows where IS_DELETED is True
-    df = df[df["IS_DELETED"] != True]
-    return df
+# Everything below counts towards the rerun, however the script ends
+with measured_rerun("targets"):
+    # The three reads don't depend on each other, so run them side by side
+    users, df_markets, appointments = gather(
+        lambda: get_user_directory(tag="targets"),
+        lambda: get_market(version('markets')),
+        get_appointments,
+    )
 
+    st.warning("ⓘ This page is for managers only. If you're not a manager or responsible for updating closer targets, please use the appointments page only.")
 
-df_users = get_users()
-df_markets = get_market()
-df_profile_pictures = get_profile_pictures()  # Reintroduced to fetch profile picture
-appointments = get_appointments()
+    if 'NAME' in appointments.columns:
+        appointments = appointments.rename(columns={'NAME': 'FULL_NAME'})
 
-st.warning("ⓘ This page is for managers only. If you're not a manager or responsible for updating closer targets, please use the appointments page only.")
+    if 'SALESFORCE_ID' not in appointments.columns:
+        appointments['SALESFORCE_ID'] = ''
 
-if 'NAME' in appointments.columns:
-    appointments = appointments.rename(columns={'NAME': 'FULL_NAME'})
+    if 'PROFILE_PICTURE' not in appointments.columns:
+        appointments['PROFILE_PICTURE'] = 'https://i.ibb.co/ZNK5xmN/pdycc8-1-removebg-preview.png'
 
-if 'SALESFORCE_ID' not in appointments.columns:
-    appointments['SALESFORCE_ID'] = ''
+    merged_df = appointments.copy()
 
-if 'PROFILE_PICTURE' not in appointments.columns:
-    appointments['PROFILE_PICTURE'] = 'https://i.ibb.co/ZNK5xmN/pdycc8-1-removebg-preview.png'
+    if 'CLOSER' in merged_df.columns:
+        merged_df = merged_df.drop(columns=['CLOSER'])
 
-merged_df = appointments.copy()
+    # Fills and dtypes (compact ints, boolean ACTIVE, categorical TYPE/MARKET)
+    # are applied at ingest by components.schema.APPOINTMENTS_SCHEMA.
 
-if 'CLOSER' in merged_df.columns:
-    merged_df = merged_df.drop(columns=['CLOSER'])
+    valid_types = VALID_TYPES
+    valid_market_types = df_markets['MARKET'].unique()
 
-merged_df['MARKET'] = merged_df['MARKET'].fillna('No Market').astype(str)
-merged_df['GOAL'] = merged_df['GOAL'].fillna(0).astype(int)
-merged_df['RANK'] = merged_df['RANK'].fillna(100).astype(int)
-merged_df['FM_GOAL'] = merged_df['FM_GOAL'].fillna(0).astype(int)
-merged_df['FM_RANK'] = merged_df['FM_RANK'].fillna(100).astype(int)
-merged_df['TYPE'] = merged_df['TYPE'].fillna('🏠🏃 Hybrid').astype(str)
-merged_df['TYPE'] = merged_df['TYPE'].fillna('Empty').astype(str)
-merged_df['PROFILE_PICTURE'] = merged_df['PROFILE_PICTURE'].fillna('https://i.ibb.co/ZNK5xmN/pdycc8-1-removebg-preview.png').astype(str)
-merged_df['ACTIVE'] = merged_df['ACTIVE'].fillna('No').astype(str)
-merged_df['ACTIVE'] = merged_df['ACTIVE'].str.strip().str.lower().map({'yes': True, 'no': False})
-merged_df['ACTIVE'] = merged_df['ACTIVE'].fillna(False)
+    # Reset TYPE and MARKET values the editor can't offer to their defaults
+    merged_df, coerced_rows = normalize_closer_rows(merged_df, valid_markets=valid_market_types)
 
-valid_types = ['🏠🏃 Hybrid', '🏃 Field Marketing', '🏠 Web To Home']
-merged_df['TYPE'] = merged_df['TYPE'].apply(lambda x: x if x in valid_types else '🏠🏃 Hybrid')
+    edit_df = merged_df[['ROW_ID', 'PROFILE_PICTURE', 'FULL_NAME', 'MARKET', 'TYPE', 'ACTIVE', 'GOAL', 'RANK', 'FM_GOAL', 'FM_RANK', 'SALESFORCE_ID', 'CLOSER_NOTES', 'IS_DELETED']].copy()
 
-valid_market_types = df_markets['MARKET'].unique()
-merged_df['MARKET'] = merged_df['MARKET'].apply(lambda x: x if x in valid_market_types else 'No Market')
+    # Show cached thumbnails instead of the full-size remote pictures
+    edit_df['PROFILE_PICTURE'] = inline_pictures(edit_df['PROFILE_PICTURE'], 28)
 
-edit_df = merged_df[['ROW_ID', 'PROFILE_PICTURE', 'FULL_NAME', 'MARKET', 'TYPE', 'ACTIVE', 'GOAL', 'RANK', 'FM_GOAL', 'FM_RANK', 'SALESFORCE_ID', 'CLOSER_NOTES', 'IS_DELETED']].copy()
+    # UPDATED SECTION: Always update the session state with the latest edit_df
+    st.session_state['filtered_edit_df'] = edit_df.copy()
 
-# UPDATED SECTION: Always update the session state with the latest edit_df
-st.session_state['filtered_edit_df'] = edit_df.copy()
+    def get_market_options(filtered_df):
+        return ['All Markets'] + sorted(valid_market_types)
 
-def get_market_options(filtered_df):
-    return ['All Markets'] + sorted(valid_market_types)
-
-def get_closer_options(filtered_df):
-    return ['All Closers'] + sorted(filtered_df['FULL_NAME'].unique())
-
-def get_type_options(filtered_df):
-    return ['All Channels'] + sorted(filtered_df['TYPE'].unique())
-
-st.write("## 🎯 Edit Closer Targets")
-
-filtered_edit_df = st.session_state['filtered_edit_df'].copy()
-
-cols1, cols2, cols3 = st.columns(3)
-
-with cols1:
-    market_input = st.selectbox('', get_market_options(filtered_edit_df), index=0, key='market_select')
-
-if market_input != 'All Markets':
-    filtered_edit_df = filtered_edit_df[filtered_edit_df['MARKET'] == market_input]
-
-with cols2:
-    closer_input = st.selectbox('', get_closer_options(filtered_edit_df), index=0, key='closer_select')
-
-if closer_input != 'All Closers':
-    filtered_edit_df = filtered_edit_df[filtered_edit_df['FULL_NAME'] == closer_input]
-
-with cols3:
-    type_input = st.selectbox('', get_type_options(filtered_edit_df), index=0, key='type_select')
-
-if type_input != 'All Channels':
-    filtered_edit_df = filtered_edit_df[filtered_edit_df['TYPE'] == type_input]
-
-filtered_edit_df = filtered_edit_df.sort_values(by='FULL_NAME')
-
-# Generate closer list from df_users
-closer_list = sorted(df_users['FULL_NAME'].dropna().unique())
-
-new_row_id = str(uuid.uuid4()).replace('-', '')
-
-if hasattr(st, 'popover'):
-    with st.popover("Add Closer  + ", disabled=False):
-        with st.form(clear_on_submit=True, key='add_closer_form', border=False):
-            closer_selection = st.selectbox("Closer Name", options=closer_list)
-            market_selection = st.selectbox("Market", options=valid_market_types)
-            type_selection = st.selectbox("Type", options=valid_types)
-            w2h_goal = st.number_input("Web Goal", min_value=0, max_value=60, value=12, step=1)
-            w2h_rank = st.number_input("Web Rank", min_value=0, max_value=60, value=1, step=1)
-            fm_goal = st.number_input("FM Goal", min_value=0, max_value=60, value=12, step=1)
-            fm_rank = st.number_input("FM Rank", min_value=0, max_value=60, value=1, step=1)
-            is_active = st.checkbox("Active?", value=True)
-            closer_notes = st.text_area("Notes")
-
-            submit_button = st.form_submit_button("Submit")
-            if submit_button:
-        # Generate a unique Salesforce ID or use a different field as a unique identifier
-                selected_user = df_users[df_users['FULL_NAME'] == closer_selection]
-                salesforce_id = selected_user['SALESFORCE_ID'].iloc[0]
-                full_name = closer_selection.strip().replace("'", "''")
-                active_str = 'Yes' if is_active else 'No'
-
-        # Fetch profile picture
-                profile_pic = 'https://i.ibb.co/ZNK5xmN/pdycc8-1-removebg-preview.png'
-                if closer_selection in df_profile_pictures['FULL_NAME'].values:
-                    profile_pic = df_profile_pictures.loc[df_profile_pictures['FULL_NAME'] == closer_selection, 'PROFILE_PICTURE'].iloc[0]
-                    if pd.isna(profile_pic) or profile_pic.strip() == '':
-                        profile_pic = 'https://i.ibb.co/ZNK5xmN/pdycc8-1-removebg-preview.png'
-
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-                insert_query = f"""
-                INSERT INTO raw.snowflake.lm_appointments 
-                (ROW_ID, CLOSER_ID, NAME, GOAL, RANK, FM_GOAL, FM_RANK, ACTIVE, TYPE, MARKET, TIMESTAMP, PROFILE_PICTURE, CLOSER_NOTES)
-                VALUES ('{new_row_id}', '{salesforce_id}', '{full_name}', {w2h_goal}, {w2h_rank}, {fm_goal}, {fm_rank}, '{active_str}', 
-                        '{type_selection}', '{market_selection}', '{timestamp}', '{profile_pic}', '{closer_notes}');
-                """
-
-                try:
-                    session.sql(insert_query).collect()
-                    st.success(f"You successfully added {closer_selection}")
-                    get_appointments.clear()
-                    st.session_state['data_updated'] = True
-                    st.cache_data.clear()
-                    st.rerun()  # Force app to rerun to show new data immediately
-                except Exception as e:
-                    st.error(f"Error adding {closer_selection}: {str(e)}")
-
-else:
-    st.info("Popover feature not available. Please upgrade Streamlit or use an alternative component.")
-
-with st.form('editor_form'):
-    original_filtered_df = filtered_edit_df.copy().reset_index(drop=True)
-    
-    edited_df = st.data_editor(
-        filtered_edit_df.reset_index(drop=True),
-        column_order=['PROFILE_PICTURE', 'FULL_NAME', 'MARKET', 'TYPE', 'ACTIVE', 'GOAL', 'RANK', 'FM_GOAL', 'FM_RANK', 'CLOSER_NOTES', 'IS_DELETED'],
-        disabled={'ROW_ID': True, 'FULL_NAME': True, 'PROFILE_PICTURE': True},
-        hide_index=True,
-        use_container_width=True,
-        column_config={
-            'PROFILE_PICTURE': st.column_config.ImageColumn(label=' '),
-            'ACTIVE': st.column_config.CheckboxColumn('Active', help="Check if the closer is active", default=False),
-            'FULL_NAME': st.column_config.TextColumn('Name'),
-            'MARKET': st.column_config.SelectboxColumn('Market', options=valid_market_types, help="Select the market", required=True),
-            'GOAL': st.column_config.NumberColumn('W2H Goal'),
-            'RANK': st.column_config.NumberColumn('W2H Rank'),
-            'FM_GOAL': st.column_config.NumberColumn('FM Goal'),
-            'FM_RANK': st.column_config.NumberColumn('FM Rank'),
-            'CLOSER_NOTES': st.column_config.TextColumn('Notes'),
-            'TYPE': st.column_config.SelectboxColumn('Type', options=valid_types, help="Select the type of channel", required=True),
-            'IS_DELETED': st.column_config.CheckboxColumn('Deleted', help="Check to remove this closer from the table", default=False),
-        }
-    )
-    
-    submitted = st.form_submit_button('Save changes')
-
-if submitted:
-    edited_df = edited_df.astype(str)
-    original_filtered_df = original_filtered_df.astype(str)
-    edited_df = edited_df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
-    original_filtered_df = original_filtered_df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
-    changes = edited_df.compare(original_filtered_df)
-
-    if changes.empty:
-        st.info("No changes detected.")
-    else:
-        st.session_state['filtered_edit_df'].update(edited_df)
-        
-        queries = []
-        for idx in changes.index.unique():
-            row = edited_df.loc[idx]
-            row_id = row['ROW_ID']
-            is_deleted = row['IS_DELETED']
-            full_name = row['FULL_NAME'].replace("'", "''")
-            new_goal = int(row['GOAL'])
-            new_rank = int(row['RANK'])
-            fm_goal = int(row['FM_GOAL'])
-            fm_rank = int(row['FM_RANK'])
-            new_active = row['ACTIVE']
-            new_type = row['TYPE']
-            new_market = row['MARKET']
-            profile_picture = row['PROFILE_PICTURE']
-            closer_notes = row['CLOSER_NOTES']
-            salesforce_id = row['SALESFORCE_ID'].replace("'", "''")
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            active_str = 'Yes' if new_active.lower() == 'true' else 'No'
-
-            query = f"""
-            MERGE INTO raw.snowflake.lm_appointments AS target
-            USING (SELECT '{row_id}' AS ROW_ID) AS source
-            ON target.ROW_ID = source.ROW_ID
-            WHEN MATCHED THEN
-                UPDATE SET
-                    GOAL = {new_goal},
-                    RANK = {new_rank},
-                    FM_GOAL = {fm_goal},
-                    FM_RANK = {fm_rank},
-                    ACTIVE = '{active_str}',
-                    TYPE = '{new_type}',
-                    MARKET = '{new_market}',
-                    TIMESTAMP = '{timestamp}',
-                    PROFILE_PICTURE = '{profile_picture}',
-                    CLOSER_NOTES = '{closer_notes}',
-                    IS_DELETED = {str(is_deleted).upper()}
-            WHEN NOT MATCHED THEN
-                INSERT (CLOSER_ID, NAME, GOAL, RANK, FM_GOAL, FM_RANK, ACTIVE, TYPE, MARKET, TIMESTAMP, PROFILE_PICTURE, CLOSER_NOTES, IS_DELETED)
-                VALUES ('{salesforce_id}', '{full_name}', {new_goal}, {new_rank}, {fm_goal}, {fm_rank}, '{active_str}', '{new_type}', '{new_market}', '{timestamp}', '{profile_picture}', '{closer_notes}', '{is_deleted}');
-            """
-            queries.append(query)
+    def get_closer_options(filtered_df):
+        return ['All Closers'] + sorted(filtered_df['FULL_NAME'].unique())
 
-        with st.spinner('Saving changes...'):
-            for query in queries:
-                try:
-                    session.sql(query).collect()
-                    st.success(f"Saved changes for {row['FULL_NAME']}")
-                    get_appointments.clear()
-                    st.session_state['data_updated'] = True
-                    st.cache_data.clear()
-                    st.rerun()  # Force app to rerun to show new data immediately
-                except Exception as e:
-                    st.error(f"Error saving changes for {row['FULL_NAME']}: {str(e)}")
-
-        get_appointments.clear()
-        st.session_state['data_updated'] = True
-        st.cache_data.clear()
-
-st.divider()
-st.write("## 🏙️ Edit Markets")
-
-with st.form('market_editor_form'):
-    original_market_df = df_markets.copy().reset_index(drop=True)
-    edited_market_df = st.data_editor(
-        df_markets[['MARKET', 'MARKET_GROUP', 'RANK', 'NOTES']].reset_index(drop=True),
-        num_rows="dynamic",
-        hide_index=True,
-        use_container_width=True,
-        column_config={
-            'MARKET': st.column_config.TextColumn('Market'),
-            'MARKET_GROUP': st.column_config.TextColumn('Market Group'),
-            'RANK': st.column_config.NumberColumn('Rank'),
-            'NOTES': st.column_config.TextColumn('Notes'),
-        }
-    )
+    def get_type_options(filtered_df):
+        return ['All Channels'] + sorted(filtered_df['TYPE'].unique())
+
+    st.write("## 🎯 Edit Closer Targets")
+
+    if not coerced_rows.empty:
+        with st.expander(f"ⓘ {len(coerced_rows)} closer values were reset to defaults"):
+            st.dataframe(coerced_rows.drop(columns=['ROW']), hide_index=True, use_container_width=True)
 
-    submitted_market = st.form_submit_button('Save Changes')
+    filtered_edit_df = st.session_state['filtered_edit_df'].copy()
 
-if submitted_market:
-    edited_market_df = edited_market_df.reset_index(drop=True)
-    original_market_df = original_market_df.reset_index(drop=True)
+    cols1, cols2, cols3 = st.columns(3)
 
-    original_markets = set(original_market_df['MARKET'])
-    edited_markets = set(edited_market_df['MARKET'])
+    with cols1:
+        market_input = st.selectbox('', get_market_options(filtered_edit_df), index=0, key='market_select')
 
-    new_markets = edited_markets - original_markets
-    deleted_markets = original_markets - edited_markets
-    common_markets = original_markets & edited_markets
+    if market_input != 'All Markets':
+        filtered_edit_df = filtered_edit_df[filtered_edit_df['MARKET'] == market_input]
 
-    queries = []
+    with cols2:
+        closer_input = st.selectbox('', get_closer_options(filtered_edit_df), index=0, key='closer_select')
 
-    for market in deleted_markets:
-        market_safe = market.replace("'", "''")
-        query = f"DELETE FROM raw.snowflake.lm_markets WHERE MARKET = '{market_safe}';"
-        queries.append((query, f"Deleted market '{market}'"))
+    if closer_input != 'All Closers':
+        filtered_edit_df = filtered_edit_df[filtered_edit_df['FULL_NAME'] == closer_input]
 
-    new_markets_df = edited_market_df[edited_market_df['MARKET'].isin(new_markets)]
-    for idx, row in new_markets_df.iterrows():
-        market = row['MARKET']
-        if pd.isna(market) or market == '':
-            st.error("Market name cannot be empty.")
-            continue
-        market_safe = market.replace("'", "''")
+    with cols3:
+        type_input = st.selectbox('', get_type_options(filtered_edit_df), index=0, key='type_select')
 
-        market_group = row.get('MARKET_GROUP', '')
-        if pd.isna(market_group):
-            market_group = ''
-        market_group = market_group.replace("'", "''")
+    if type_input != 'All Channels':
+        filtered_edit_df = filtered_edit_df[filtered_edit_df['TYPE'] == type_input]
 
-        rank = row.get('RANK', '')
-        if pd.isna(rank) or rank == '':
-            rank_value = 'NULL'
+    filtered_edit_df = filtered_edit_df.sort_values(by='FULL_NAME')
+
+    # Generate closer list from the user directory
+    closer_list = users.names
+
+    new_row_id = str(uuid.uuid4()).replace('-', '')
+
+    if hasattr(st, 'popover'):
+        with st.popover("Add Closer  + ", disabled=False):
+            with st.form(clear_on_submit=True, key='add_closer_form', border=False):
+                closer_selection = st.selectbox("Closer Name", options=closer_list)
+                market_selection = st.selectbox("Market", options=valid_market_types)
+                type_selection = st.selectbox("Type", options=valid_types)
+                w2h_goal = st.number_input("Web Goal", min_value=0, max_value=60, value=12, step=1)
+                w2h_rank = st.number_input("Web Rank", min_value=0, max_value=60, value=1, step=1)
+                fm_goal = st.number_input("FM Goal", min_value=0, max_value=60, value=12, step=1)
+                fm_rank = st.number_input("FM Rank", min_value=0, max_value=60, value=1, step=1)
+                is_active = st.checkbox("Active?", value=True)
+                closer_notes = st.text_area("Notes")
+
+                submit_button = st.form_submit_button("Submit")
+                if submit_button:
+            # Generate a unique Salesforce ID or use a different field as a unique identifier
+                    salesforce_id = users.salesforce_id(closer_selection)
+                    full_name = closer_selection.strip()
+                    active_str = 'Yes' if is_active else 'No'
+                    profile_pic = users.picture(closer_selection)
+
+                    new_row = {
+                        'ROW_ID': new_row_id, 'CLOSER_ID': salesforce_id, 'NAME': full_name,
+                        'GOAL': w2h_goal, 'RANK': w2h_rank, 'FM_GOAL': fm_goal, 'FM_RANK': fm_rank,
+                        'ACTIVE': active_str, 'TYPE': type_selection, 'MARKET': market_selection,
+                        'PROFILE_PICTURE': profile_pic, 'CLOSER_NOTES': closer_notes, 'IS_DELETED': False,
+                    }
+
+                    try:
+                        add_appointment(new_row, tag="targets")
+                        st.success(f"You successfully added {closer_selection}")
+                        st.rerun()  # Rerun to show the new row; it's already in the local store
+                    except Exception as e:
+                        st.error(f"Error adding {closer_selection}: {str(e)}")
+
+    else:
+        st.info("Popover feature not available. Please upgrade Streamlit or use an alternative component.")
+
+    with st.form('editor_form'), rendering():
+        original_filtered_df = filtered_edit_df.copy().reset_index(drop=True)
+
+        edited_df = st.data_editor(
+            filtered_edit_df.reset_index(drop=True),
+            column_order=['PROFILE_PICTURE', 'FULL_NAME', 'MARKET', 'TYPE', 'ACTIVE', 'GOAL', 'RANK', 'FM_GOAL', 'FM_RANK', 'CLOSER_NOTES', 'IS_DELETED'],
+            disabled={'ROW_ID': True, 'FULL_NAME': True, 'PROFILE_PICTURE': True},
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'PROFILE_PICTURE': st.column_config.ImageColumn(label=' '),
+                'ACTIVE': st.column_config.CheckboxColumn('Active', help="Check if the closer is active", default=False),
+                'FULL_NAME': st.column_config.TextColumn('Name'),
+                'MARKET': st.column_config.SelectboxColumn('Market', options=valid_market_types, help="Select the market", required=True),
+                'GOAL': st.column_config.NumberColumn('W2H Goal'),
+                'RANK': st.column_config.NumberColumn('W2H Rank'),
+                'FM_GOAL': st.column_config.NumberColumn('FM Goal'),
+                'FM_RANK': st.column_config.NumberColumn('FM Rank'),
+                'CLOSER_NOTES': st.column_config.TextColumn('Notes'),
+                'TYPE': st.column_config.SelectboxColumn('Type', options=valid_types, help="Select the type of channel", required=True),
+                'IS_DELETED': st.column_config.CheckboxColumn('Deleted', help="Check to remove this closer from the table", default=False),
+            }
+        )
+
+        submitted = st.form_submit_button('Save changes')
+
+    if submitted:
+        patches = column_patches(original_filtered_df, edited_df, 'ROW_ID', list(EDITABLE_COLUMNS))
+
+        if not patches:
+            st.info("No changes detected.")
         else:
-            try:
-                rank_value = int(rank)
-            except (ValueError, TypeError):
-                st.error(f"Invalid rank value for market '{market}'. Rank must be an integer.")
-                continue
-
-        notes = row.get('NOTES', '')
-        if pd.isna(notes):
-            notes = ''
-        notes = notes.replace("'", "''")
-
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        query = f"""
-        INSERT INTO raw.snowflake.lm_markets (MARKET, MARKET_GROUP, RANK, NOTES, TIMESTAMP)
-        VALUES ('{market_safe}', '{market_group}', {rank_value}, '{notes}', '{timestamp}');
-        """
-        queries.append((query, f"Inserted new market '{market}'"))
-
-    for market in common_markets:
-        edited_row = edited_market_df[edited_market_df['MARKET'] == market].iloc[0]
-        original_row = original_market_df[original_market_df['MARKET'] == market].iloc[0]
-        columns_to_compare = ['MARKET_GROUP', 'RANK', 'NOTES']
-        if not edited_row[columns_to_compare].equals(original_row[columns_to_compare]):
-            market_safe = market.replace("'", "''")
-
-            market_group = edited_row.get('MARKET_GROUP', '')
-            if pd.isna(market_group):
-                market_group = ''
-            market_group = market_group.replace("'", "''")
-
-            rank = edited_row.get('RANK', '')
-            if pd.isna(rank) or rank == '':
-                rank_value = 'NULL'
-            else:
-                try:
-                    rank_value = int(rank)
-                except (ValueError, TypeError):
-                    st.error(f"Invalid rank value for market '{market}'. Rank must be an integer.")
-                    continue
-
-            notes = edited_row.get('NOTES', '')
-            if pd.isna(notes):
-                notes = ''
-            notes = notes.replace("'", "''")
-
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            query = f"""
-            UPDATE raw.snowflake.lm_markets
-            SET MARKET_GROUP = '{market_group}', RANK = {rank_value}, NOTES = '{notes}', TIMESTAMP = '{timestamp}'
-            WHERE MARKET = '{market_safe}';
-            """
-            queries.append((query, f"Updated market '{market}'"))
-
-    if queries:
+            names = dict(zip(original_filtered_df['ROW_ID'], original_filtered_df['FULL_NAME']))
+
+            with st.spinner('Saving changes...'):
+                results = save_appointment_patches(patches, names, tag="targets")
+
+            for full_name, error in results:
+                if error is None:
+                    st.success(f"Saved changes for {full_name}")
+                else:
+                    st.error(f"Error saving changes for {full_name}: {error}")
+
+    st.divider()
+    st.write("## 🏙️ Edit Markets")
+
+    with st.form('market_editor_form'):
+        original_market_df = df_markets.copy().reset_index(drop=True)
+        edited_market_df = st.data_editor(
+            df_markets[['MARKET', 'MARKET_GROUP', 'RANK', 'NOTES']].reset_index(drop=True),
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'MARKET': st.column_config.TextColumn('Market'),
+                'MARKET_GROUP': st.column_config.TextColumn('Market Group'),
+                'RANK': st.column_config.NumberColumn('Rank'),
+                'NOTES': st.column_config.TextColumn('Notes'),
+            }
+        )
+
+        submitted_market = st.form_submit_button('Save Changes')
+
+    if submitted_market:
         with st.spinner('Saving changes...'):
-            for query, message in queries:
-                try:
-                    session.sql(query).collect()
-                    st.success(message)
-                except Exception as e:
-                    st.error(f"Error processing {message}: {str(e)}")
-        get_market.clear()
-        get_appointments.clear()
-        df_markets = get_market()
-    else:
-        st.info("No changes detected.")
\ No newline at end of file
+            messages, errors = sync_markets(original_market_df, edited_market_df, tag="targets")
+
+        if errors:
+            for error in errors:
+                st.error(error)
+            st.warning("No market changes were saved.")
+        elif messages:
+            for message in messages:
+                st.success(message)
+            bump('markets')
+            df_markets = get_market(version('markets'))
+        else:
+            st.info("No changes detected.")
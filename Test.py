@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from snowflake.snowpark import Session
+from components.normalize import VALID_TYPES, normalize_closer_rows
+from components.parallel import gather
+from components.session import query_df, execute
+from components.sql import placeholders
+from components.versions import bump, version
 
 # Configure the Streamlit page settings
 st.set_page_config(
@@ -26,46 +30,30 @@ custom_css = """
 """
 st.markdown(custom_css, unsafe_allow_html=True)
 
-# Function to create a Snowflake session using the connection parameters from Streamlit secrets
-def create_snowflake_session():
-    connection_parameters = {
-        "account": st.secrets["snowflake"]["account"],     # Snowflake account name
-        "user": st.secrets["snowflake"]["user"],           # Username
-        "password": st.secrets["snowflake"]["password"],   # Password
-        "role": st.secrets["snowflake"]["role"],           # User role
-        "warehouse": st.secrets["snowflake"]["warehouse"], # Compute warehouse
-        "database": st.secrets["snowflake"]["database"],   # Database name
-        "schema": st.secrets["snowflake"]["schema"],       # Schema name
-    }
-    return Session.builder.configs(connection_parameters).create()
-
-# Initialize the Snowflake session
-session = create_snowflake_session()
-
 # Cache the function to get appointments data to avoid redundant queries
 @st.cache_data(show_spinner=False)
-def get_appointments():
+def get_appointments(appointments_version):
     appointments_query = """
         SELECT a.NAME, a.MARKET, a.TYPE, a.ACTIVE, a.GOAL, a.RANK, a.FM_GOAL, a.FM_RANK, a.CLOSER_ID, a.TIMESTAMP, a.PROFILE_PICTURE
         FROM raw.snowflake.lm_appointments a
     """
-    return session.sql(appointments_query).to_pandas()
+    return query_df(appointments_query, tag="test")
 
 # Cache the function to get all closers from the users table
 @st.cache_data(show_spinner=False)
-def get_all_closers():
+def get_all_closers(users_version):
     closers_query = """
         SELECT DISTINCT FULL_NAME NAME, SALESFORCE_ID CLOSER_ID, PROFILE_PICTURE
         FROM operational.airtable.vw_users
         WHERE ROLE = 'Closer'  -- Adjust this condition based on your data
     """
-    return session.sql(closers_query).to_pandas()
-
-# Load the appointments data using the cached function
-appointments = get_appointments()
+    return query_df(closers_query, tag="test")
 
-# Load all closers data
-all_closers_df = get_all_closers()
+# Load the appointments and all closers data side by side
+appointments, all_closers_df = gather(
+    lambda: get_appointments(version('appointments')),
+    lambda: get_all_closers(version('users')),
+)
 
 # Now, include all closers
 available_closers_df = all_closers_df
@@ -75,8 +63,8 @@ available_closers = available_closers_df['NAME'].tolist()
 appointments['ACTIVE'] = appointments['ACTIVE'].fillna('No').astype(str).str.strip().str.lower().map({'yes': True, 'no': False})
 appointments['ACTIVE'] = appointments['ACTIVE'].fillna(False)
 
-valid_types = ['🏠🏃 Hybrid', '🏃 Field Marketing', '🏠 Web To Home']
-appointments['TYPE'] = appointments['TYPE'].apply(lambda x: x if x in valid_types else '🏠🏃 Hybrid')
+valid_types = VALID_TYPES
+appointments, _ = normalize_closer_rows(appointments, name_column='NAME')
 
 appointments['MARKET'] = appointments['MARKET'].fillna('No Market').astype(str)
 
@@ -159,10 +147,8 @@ with add_closer_container:
         if not selected_name:
             st.error("Please select a closer name.")
         else:
-            # Prepare variables for the SQL query
-            full_name = selected_name.replace("'", "''")
-            new_market = new_market.replace("'", "''")
-            new_type = new_type.replace("'", "''")
+            # Values are bound as parameters, so no quoting is needed
+            full_name = selected_name
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             active_str = 'Yes' if new_active else 'No'
             
@@ -183,37 +169,37 @@ with add_closer_container:
             
             if exists_in_appointments:
                 # Prepare the UPDATE query
-                set_clause = ",\n    ".join([f"{key} = '{value}'" if isinstance(value, str) else f"{key} = {value}" for key, value in data.items() if key != 'NAME'])
+                updates = {key: value for key, value in data.items() if key != 'NAME'}
+                set_clause = ",\n    ".join(f"{key} = ?" for key in updates)
                 query = f"""
                 UPDATE raw.snowflake.lm_appointments
                 SET {set_clause}
-                WHERE NAME = '{full_name}';
+                WHERE NAME = ?;
                 """
+                params = list(updates.values()) + [full_name]
                 action = 'updated'
             else:
                 # Prepare the INSERT query
                 columns = ", ".join(data.keys())
-                values = ", ".join([f"'{value}'" if isinstance(value, str) else f"{value}" for value in data.values()])
                 query = f"""
                 INSERT INTO raw.snowflake.lm_appointments ({columns})
-                VALUES ({values});
+                VALUES ({placeholders(len(data))});
                 """
+                params = list(data.values())
                 action = 'added'
             
             # Execute the query
             try:
-                session.sql(query).collect()
+                execute(query, tag="test", params=params)
                 st.success(f"Successfully {action} closer: {selected_name}")
                 
-                # Clear cached data functions
-                get_appointments.clear()
+                # Invalidate cached appointments only
+                bump('appointments')
                 # Reload the appointments data
-                appointments = get_appointments()
+                appointments = get_appointments(version('appointments'))
                 
                 # Update the session state
                 st.session_state['filtered_edit_df'] = appointments[['PROFILE_PICTURE', 'NAME', 'MARKET', 'TYPE', 'ACTIVE', 'GOAL', 'RANK', 'FM_GOAL', 'FM_RANK', 'CLOSER_ID']].copy()
-                # Clear the cached data
-                st.cache_data.clear()
                 
             except Exception as e:
                 st.error(f"Error processing closer: {str(e)}")
@@ -335,11 +321,23 @@ if submitted:
     if changes.empty:
         st.info("No changes detected.")
     else:
-        # Prepare to handle updates
-        queries = []
+        # One statement text for every row; only the bound values differ
+        update_query = """
+            UPDATE raw.snowflake.lm_appointments
+            SET GOAL = ?,
+                RANK = ?,
+                FM_GOAL = ?,
+                FM_RANK = ?,
+                ACTIVE = ?,
+                TYPE = ?,
+                MARKET = ?,
+                TIMESTAMP = ?
+            WHERE NAME = ?;
+        """
+        updates = []
         for idx in changes.index.unique():
             row = edited_df.loc[idx]
-            full_name = row['NAME'].replace("'", "''")
+            full_name = row['NAME']
             new_goal = int(row['GOAL'])
             new_rank = int(row['RANK'])
             fm_goal = int(row['FM_GOAL'])
@@ -351,38 +349,23 @@ if submitted:
 
             active_str = 'Yes' if new_active else 'No'
 
-            query = f"""
-            UPDATE raw.snowflake.lm_appointments
-            SET GOAL = {new_goal},
-                RANK = {new_rank},
-                FM_GOAL = {fm_goal},
-                FM_RANK = {fm_rank},
-                ACTIVE = '{active_str}',
-                TYPE = '{new_type}',
-                MARKET = '{new_market}',
-                TIMESTAMP = '{timestamp}'
-            WHERE NAME = '{full_name}';
-            """
-            queries.append(query)
+            params = [new_goal, new_rank, fm_goal, fm_rank, active_str, str(new_type), str(new_market), timestamp, full_name]
+            updates.append((full_name, params))
 
         # Execute all queries
         with st.spinner('Saving changes...'):
-            for query in queries:
+            for full_name, params in updates:
                 try:
-                    session.sql(query).collect()
-                    st.success(f"Saved changes for {row['NAME']}")
+                    execute(update_query, tag="test", params=params)
+                    st.success(f"Saved changes for {full_name}")
                 except Exception as e:
-                    st.error(f"Error saving changes for {row['NAME']}: {str(e)}")
+                    st.error(f"Error saving changes for {full_name}: {str(e)}")
 
-        # Clear cached data
-        get_appointments.clear()
-        get_all_closers.clear()
+        # Invalidate cached appointments only
+        bump('appointments')
 
         # Reload the appointments data
-        appointments = get_appointments()
+        appointments = get_appointments(version('appointments'))
 
         # Update the session state
-        st.session_state['filtered_edit_df'] = appointments[['PROFILE_PICTURE', 'NAME', 'MARKET', 'TYPE', 'ACTIVE', 'GOAL', 'RANK', 'FM_GOAL', 'FM_RANK', 'CLOSER_ID']].copy()
-
-        # Clear the cached data
-        st.cache_data.clear()
\ No newline at end of file
+        st.session_state['filtered_edit_df'] = appointments[['PROFILE_PICTURE', 'NAME', 'MARKET', 'TYPE', 'ACTIVE', 'GOAL', 'RANK', 'FM_GOAL', 'FM_RANK', 'CLOSER_ID']].copy()
\ No newline at end of file
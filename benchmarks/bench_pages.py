@@ -0,0 +1,88 @@
+"""End-to-end page benchmark against the offline Snowflake stand-in.
+
+Seeds synthetic data at the requested scale, points the app's session pool
+at benchmarks.fake_snowflake, then runs Targets.py and both appointment
+boards through Streamlit's AppTest. Each page starts from empty caches; the
+first run is the cold one and the rest are reruns. Reports per-run latency,
+statements sent to the backend (including any started by background threads
+during the run) and peak Python memory. Streamlit's own warnings go to
+stderr; add 2>/dev/null for just the table.
+
+    python -m benchmarks.bench_pages [--closers 1000] [--opportunities 100000] [--reruns 5]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = ['Targets.py', 'pages/1_Web_Appointments.py', 'pages/2_FM_Appointments.py']
+
+
+def offline_picture(url):
+    from PIL import Image
+
+    # A flat colour per URL is enough to exercise resizing and caching
+    out = io.BytesIO()
+    Image.new('RGB', (400, 400), color=hash(url) & 0xFFFFFF).save(out, format='PNG')
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--closers', type=int, default=1_000)
+    parser.add_argument('--opportunities', type=int, default=100_000)
+    parser.add_argument('--reruns', type=int, default=5)
+    parser.add_argument('--pages', nargs='+', default=PAGES)
+    args = parser.parse_args()
+
+    # Snapshot and thumbnail directories are read at import time
+    scratch = tempfile.mkdtemp(prefix='lm-bench-')
+    os.environ['LM_SNAPSHOT_DIR'] = os.path.join(scratch, 'snapshots')
+    os.environ['LM_IMAGE_DIR'] = os.path.join(scratch, 'images')
+    sys.path.insert(0, str(ROOT))
+
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    from benchmarks.fake_snowflake import FakeBackend
+    from benchmarks.seed import seed
+    from components import images, session
+
+    backend = FakeBackend()
+    start = time.perf_counter()
+    seed(backend, closers=args.closers, opportunities=args.opportunities)
+    print(f"Seeded {args.closers} closers and {args.opportunities} opportunities in {time.perf_counter() - start:.1f}s")
+
+    session.create_snowflake_session = backend.session
+    image_cache = images.ImageCache(fetcher=offline_picture)
+    images.get_image_cache = lambda: image_cache
+
+    tracemalloc.start()
+    print(f"{'page':<32} {'run':>5} {'ms':>10} {'queries':>8} {'peak MB':>8}")
+    for page in args.pages:
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        app = AppTest.from_file(str(ROOT / page), default_timeout=600)
+
+        for run in range(args.reruns + 1):
+            queries = backend.query_count()
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            app.run()
+            elapsed = (time.perf_counter() - start) * 1000
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+
+            label = 'cold' if run == 0 else str(run)
+            print(f"{page:<32} {label:>5} {elapsed:>10.1f} {backend.query_count() - queries:>8} {peak:>8.1f}")
+            if app.exception:
+                print(f"  {page} raised: {app.exception[0].value}")
+                break
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Offline stand-in for the parts of Snowpark this app uses, on DuckDB.
+
+Statements are translated from Snowflake SQL with sqlglot and run against a
+single in-memory DuckDB database that has the raw.* and operational.*
+schemas the app reads. Each FakeSession gets its own DuckDB connection, so
+temporary tables and transactions stay per session as they do in Snowflake.
+
+Every statement is recorded with its query tag and duration, which is what
+the page benchmarks count. Needs the packages in benchmarks/requirements.txt.
+"""
+import functools
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import duckdb
+    import sqlglot
+except ImportError as e:
+    raise ImportError("The offline backend needs duckdb and sqlglot: pip install -r benchmarks/requirements.txt") from e
+
+SCHEMAS = {
+    'raw': ['snowflake', 'salesforce'],
+    'operational': ['salesforce', 'airtable'],
+}
+
+Statement = namedtuple('Statement', ['tag', 'sql', 'seconds', 'rows'])
+Column = namedtuple('Column', ['name'])
+
+
+# sqlglot's output for the JSON-array binds in components.sql.json_rows_source,
+# and what DuckDB needs instead: a row per array element, fields read as text
+FLATTEN_REWRITES = [
+    ("TABLE(UNNEST(INPUT => JSON(?)))", "(SELECT UNNEST(CAST(? AS JSON[])) AS value)"),
+    (" -> '$.", " ->> '$."),
+]
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(sql):
+    statements = []
+    for statement in sqlglot.transpile(sql, read='snowflake', write='duckdb'):
+        for snowflake, duckdb_sql in FLATTEN_REWRITES:
+            statement = statement.replace(snowflake, duckdb_sql)
+        statements.append(statement)
+    return tuple(statements)
+
+
+class FakeBackend:
+    def __init__(self):
+        self._db = duckdb.connect()
+        for catalog, schemas in SCHEMAS.items():
+            self._db.execute(f"ATTACH ':memory:' AS {catalog}")
+            for schema in schemas:
+                self._db.execute(f"CREATE SCHEMA {catalog}.{schema}")
+        self._lock = threading.Lock()
+        self.statements = []
+
+    def session(self):
+        return FakeSession(self)
+
+    # Create `table` (catalog.schema.name) from a pandas DataFrame
+    def load_table(self, table, df):
+        connection = self._db.cursor()
+        connection.register('seed_frame', df)
+        connection.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM seed_frame")
+        connection.unregister('seed_frame')
+        connection.close()
+
+    def record(self, tag, sql, seconds, rows):
+        with self._lock:
+            self.statements.append(Statement(tag, sql, seconds, rows))
+
+    def query_count(self):
+        with self._lock:
+            return len(self.statements)
+
+    def _connect(self):
+        return self._db.cursor()
+
+
+# Runs one Snowflake statement (which may translate to several DuckDB ones)
+# and returns the Arrow result of the last, with Snowflake's upper-case
+# column names. `params` bind to the qmark placeholders, as in Snowpark.
+def _run(connection, backend, tag, sql, params=None):
+    start = time.perf_counter()
+    result = None
+    for statement in translate(sql):
+        cursor = connection.execute(statement, params) if params else connection.execute(statement)
+        result = cursor.fetch_arrow_table() if cursor.description else None
+    if result is not None:
+        result = result.rename_columns([name.upper() for name in result.column_names])
+    backend.record(tag, sql, time.perf_counter() - start, result.num_rows if result is not None else 0)
+    return result
+
+
+class FakeSession:
+    def __init__(self, backend):
+        self._backend = backend
+        self._connection = backend._connect()
+        self.query_tag = None
+        self.connection = FakeConnection(self)
+
+    def sql(self, sql, params=None):
+        return FakeDataFrame(self, sql, params)
+
+    def close(self):
+        self._connection.close()
+
+    def _run(self, sql, params=None):
+        return _run(self._connection, self._backend, self.query_tag, sql, params)
+
+
+class FakeDataFrame:
+    def __init__(self, session, sql, params):
+        self._session = session
+        self._sql = sql
+        self._params = params
+
+    def to_pandas(self):
+        result = self._session._run(self._sql, self._params)
+        return result.to_pandas() if result is not None else None
+
+    def collect(self):
+        result = self._session._run(self._sql, self._params)
+        if result is None:
+            return []
+        return list(zip(*(column.to_pylist() for column in result.columns)))
+
+
+# The snowflake.connector surface used by components.session.query_typed
+class FakeConnection:
+    def __init__(self, session):
+        self._session = session
+
+    def cursor(self):
+        return FakeCursor(self._session)
+
+
+class FakeCursor:
+    def __init__(self, session):
+        self._session = session
+        self._result = None
+        self.description = None
+
+    def execute(self, sql, params=None):
+        self._result = self._session._run(sql, params)
+        names = self._result.column_names if self._result is not None else []
+        self.description = [Column(name) for name in names]
+        return self
+
+    def fetch_arrow_batches(self):
+        # Like the connector, an empty result has no batches at all
+        if self._result is not None and self._result.num_rows:
+            yield self._result
+
+    def fetch_arrow_all(self, force_return_table=False):
+        if self._result is None or (not self._result.num_rows and not force_return_table):
+            return None
+        return self._result
+
+    def close(self):
+        self._result = None
@@ -0,0 +1,86 @@
+"""Synthetic lm_appointments, lm_markets, team member and opportunity data.
+
+Sized by the number of closers and opportunities so the same pages can be
+measured from a small office up to the whole company.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from components.normalize import VALID_TYPES
+from components.schema import DEFAULT_PROFILE_PICTURE
+
+SALES_CHANNELS = ['Web To Home', 'Outside Sales', 'Retail']
+MARKET_GROUPS = ['North', 'South', 'East', 'West', 'Central']
+PICTURE_HOST = "https://pictures.invalid"
+
+
+def _names(rng, count):
+    first = np.array(['Alex', 'Sam', 'Jordan', 'Taylor', 'Casey', 'Riley', 'Morgan', 'Jamie', 'Avery', 'Quinn'])
+    last = np.array(['Smith', 'Lee', 'Garcia', 'Brown', 'Nguyen', 'Khan', 'Silva', 'Cohen', 'Okafor', 'Rossi'])
+    # The row number keeps names unique at any scale
+    return (
+        pd.Series(rng.choice(first, count)) + ' ' + pd.Series(rng.choice(last, count))
+        + pd.Series(np.arange(count)).astype(str)
+    )
+
+
+def seed(backend, closers=1_000, opportunities=100_000, markets=None, weeks=26, seed=0):
+    rng = np.random.default_rng(seed)
+    markets = markets or max(5, min(120, closers // 15))
+    now = datetime.now().replace(microsecond=0)
+
+    market_names = [f"Market {i:03d}" for i in range(markets)]
+    backend.load_table('raw.snowflake.lm_markets', pd.DataFrame({
+        'MARKET': market_names,
+        'MARKET_GROUP': rng.choice(MARKET_GROUPS, markets),
+        'RANK': rng.integers(1, 20, markets),
+        'NOTES': [f"Notes for {name}" for name in market_names],
+        'TIMESTAMP': pd.Series([pd.Timestamp(now)] * markets),
+    }))
+
+    # Twice as many team members as closers; a third of them use the default picture
+    members = closers * 2
+    names = _names(rng, members)
+    ids = pd.Series(np.arange(members)).map(lambda i: f"005{i:012d}")
+    pictures = np.where(
+        rng.random(members) < 1 / 3,
+        DEFAULT_PROFILE_PICTURE,
+        PICTURE_HOST + '/' + pd.Series(np.arange(members)).astype(str) + '.png',
+    )
+    backend.load_table('operational.salesforce.vw_team_members_flattened', pd.DataFrame({
+        'user.name': names,
+        'team_members.user_id': ids,
+        'user.picture_link': pictures,
+        'user.term_date': pd.Series([None] * members, dtype='datetime64[ns]'),
+    }))
+
+    backend.load_table('raw.snowflake.lm_appointments', pd.DataFrame({
+        'ROW_ID': [f"{i:032x}" for i in range(closers)],
+        'CLOSER_ID': ids[:closers],
+        'NAME': names[:closers],
+        'GOAL': rng.integers(5, 30, closers),
+        'RANK': rng.integers(1, 50, closers),
+        'FM_GOAL': rng.integers(5, 30, closers),
+        'FM_RANK': rng.integers(1, 50, closers),
+        'ACTIVE': np.where(rng.random(closers) < 0.9, 'Yes', 'No'),
+        'TYPE': rng.choice(VALID_TYPES, closers),
+        'MARKET': rng.choice(market_names, closers),
+        'TIMESTAMP': pd.Timestamp(now) - pd.to_timedelta(rng.integers(0, 90 * 24 * 3600, closers), unit='s'),
+        'PROFILE_PICTURE': pictures[:closers],
+        'CLOSER_NOTES': pd.Series([None] * closers, dtype='string'),
+        'IS_DELETED': rng.random(closers) < 0.02,
+    }))
+
+    # Appointments spread over the last `weeks` weeks and the next two
+    start = now - timedelta(weeks=weeks)
+    span = (weeks + 2) * 7 * 24 * 3600
+    scheduled = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, span, opportunities), unit='s')
+    backend.load_table('raw.salesforce.opportunity', pd.DataFrame({
+        'id': [f"006{i:012d}" for i in range(opportunities)],
+        'owner_id': ids[:closers].to_numpy()[rng.integers(0, closers, opportunities)],
+        'sales_channel_c': rng.choice(SALES_CHANNELS, opportunities, p=[0.45, 0.45, 0.10]),
+        'first_scheduled_close_start_date_time_c': scheduled,
+        'system_modstamp': scheduled - pd.to_timedelta(rng.integers(0, 14 * 24 * 3600, opportunities), unit='s'),
+    }))
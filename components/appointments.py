@@ -0,0 +1,342 @@
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from components.metrics import record_cache
+from components.schema import APPOINTMENTS_SCHEMA, concat_typed, typed_frame
+from components.session import collect, execute, pooled_session, query_typed
+from components.snapshots import load_snapshot, save_snapshot
+from components.sql import json_rows, json_rows_source, placeholders
+from components.versions import bump, version
+
+APPOINTMENTS_TABLE = "raw.snowflake.lm_appointments"
+
+# Data editor columns a manager can change: editor column -> (table column, label)
+EDITABLE_COLUMNS = {
+    'MARKET': ('MARKET', 'Market'),
+    'TYPE': ('TYPE', 'Type'),
+    'ACTIVE': ('ACTIVE', 'Active'),
+    'GOAL': ('GOAL', 'W2H Goal'),
+    'RANK': ('RANK', 'W2H Rank'),
+    'FM_GOAL': ('FM_GOAL', 'FM Goal'),
+    'FM_RANK': ('FM_RANK', 'FM Rank'),
+    'CLOSER_NOTES': ('CLOSER_NOTES', 'Notes'),
+    'IS_DELETED': ('IS_DELETED', 'Deleted'),
+}
+WHOLE_NUMBER_COLUMNS = ('GOAL', 'RANK', 'FM_GOAL', 'FM_RANK')
+
+# Snowflake types of the lm_appointments columns, for bound bulk writes
+COLUMN_TYPES = {
+    'ROW_ID': 'VARCHAR', 'CLOSER_ID': 'VARCHAR', 'NAME': 'VARCHAR',
+    'GOAL': 'NUMBER', 'RANK': 'NUMBER', 'FM_GOAL': 'NUMBER', 'FM_RANK': 'NUMBER',
+    'ACTIVE': 'VARCHAR', 'TYPE': 'VARCHAR', 'MARKET': 'VARCHAR', 'TIMESTAMP': 'TIMESTAMP_NTZ',
+    'PROFILE_PICTURE': 'VARCHAR', 'CLOSER_NOTES': 'VARCHAR', 'IS_DELETED': 'BOOLEAN',
+}
+
+# Columns the pages read from lm_appointments
+LOAD_COLUMNS = [
+    'ROW_ID', 'CLOSER_ID', 'NAME', 'GOAL', 'RANK', 'FM_GOAL', 'FM_RANK', 'ACTIVE',
+    'TYPE', 'MARKET', 'TIMESTAMP', 'PROFILE_PICTURE', 'CLOSER_NOTES', 'IS_DELETED',
+]
+NOT_DELETED = "(IS_DELETED != 'true' OR IS_DELETED IS NULL)"
+
+REFRESH_INTERVAL = 60           # seconds between delta checks when nothing was saved
+FULL_RELOAD_INTERVAL = 60 * 60  # full reload to pick up hard deletes and NULL timestamps
+DELTA_OVERLAP_MINUTES = 5       # re-read a few minutes back to cover writer clock skew
+
+SNAPSHOT_NAME = 'appointments'
+
+MISSING = ('', 'None', 'nan', 'NaN', '<NA>')
+
+
+def _text(value):
+    value = str(value).strip()
+    return None if value in MISSING else value
+
+
+def _flag(value):
+    return str(value).strip().lower() == 'true'
+
+
+def _whole_number(value, column):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        raise ValueError(f"{column} must be a whole number, got '{value}'")
+
+
+# Turn one edited cell into the value written to lm_appointments
+def _column_value(column, value):
+    if column in WHOLE_NUMBER_COLUMNS:
+        return _whole_number(value, EDITABLE_COLUMNS[column][1])
+    if column == 'ACTIVE':
+        return 'Yes' if _flag(value) else 'No'
+    if column == 'IS_DELETED':
+        return _flag(value)
+    return _text(value)
+
+
+# One MERGE for every patched row that changed the same set of columns.
+# Only those columns and TIMESTAMP are SET; TIMESTAMP has to move so the
+# store's delta load picks the row up. The rows are bound as one JSON
+# parameter (see patch_rows), so each column set has a single statement text.
+def build_patch_merge(columns):
+    source_columns = ['ROW_ID'] + list(columns) + ['TIMESTAMP']
+    update_set = ",\n            ".join(f"{c} = source.{c}" for c in list(columns) + ['TIMESTAMP'])
+    return f"""
+    MERGE INTO {APPOINTMENTS_TABLE} AS target
+    USING (
+        {json_rows_source([(c, COLUMN_TYPES[c]) for c in source_columns])}
+    ) AS source
+    ON target.ROW_ID = source.ROW_ID
+    WHEN MATCHED THEN
+        UPDATE SET
+            {update_set};
+    """
+
+
+# Which of the staged ROW_IDs (bound as json_rows) lm_appointments still holds
+EXISTING_ROWS_QUERY = f"""
+    SELECT target.ROW_ID
+    FROM {APPOINTMENTS_TABLE} AS target
+    JOIN (
+        {json_rows_source([('ROW_ID', COLUMN_TYPES['ROW_ID'])])}
+    ) AS source
+    ON target.ROW_ID = source.ROW_ID
+"""
+MISSING_ROW_ERROR = "this row no longer exists; reload the page"
+
+
+# Write column patches from components.diff.column_patches, keyed on ROW_ID.
+#
+# Rows are grouped by the set of columns they changed and each group is one
+# MERGE that SETs only those columns, so unchanged fields are never
+# rewritten. All groups run in one transaction, which first looks up the
+# staged rows: rows someone else has deleted are reported and left out, and
+# the rest either all land or none do. Rows that fail validation are
+# reported and left out too.
+# Once the transaction commits, the same values are written through to the
+# appointment store. `names` maps ROW_ID to the closer name used in
+# messages. Returns one (name, error) pair per patched row, with error None
+# for rows that were saved.
+def save_appointment_patches(patches, names, tag=None):
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    results = {}
+    groups = {}
+    for row_id, patch in patches.items():
+        try:
+            columns = tuple(EDITABLE_COLUMNS[c][0] for c in patch)
+            values = tuple(_column_value(c, v) for c, v in patch.items())
+        except ValueError as e:
+            results[row_id] = (names.get(row_id), str(e))
+            continue
+        groups.setdefault(columns, []).append((row_id, (row_id,) + values + (timestamp,)))
+
+    staged = [row_id for rows in groups.values() for row_id, _ in rows]
+    if staged:
+        try:
+            with pooled_session(tag) as session:
+                collect(session, "BEGIN", tag)
+                try:
+                    lookup = json_rows([(row_id,) for row_id in staged], ['ROW_ID'])
+                    existing = {row[0] for row in collect(session, EXISTING_ROWS_QUERY, tag, params=[lookup])}
+                    for row_id in staged:
+                        if row_id not in existing:
+                            results[row_id] = (names.get(row_id), MISSING_ROW_ERROR)
+                    staged = [row_id for row_id in staged if row_id in existing]
+                    groups = {columns: [row for row in rows if row[0] in existing] for columns, rows in groups.items()}
+
+                    merged = 0
+                    for columns, rows in groups.items():
+                        if not rows:
+                            continue
+                        staged_rows = json_rows([values for _, values in rows], ['ROW_ID', *columns, 'TIMESTAMP'])
+                        outcome = collect(session, build_patch_merge(columns), tag, params=[staged_rows])
+                        merged += sum(int(v) for v in outcome[0]) if outcome else len(rows)
+                    if merged != len(staged):
+                        raise RuntimeError(f"only {merged} of {len(staged)} rows matched")
+                    collect(session, "COMMIT", tag)
+                except Exception:
+                    collect(session, "ROLLBACK", tag)
+                    raise
+            error = None
+        except Exception as e:
+            error = str(e)
+        for row_id in staged:
+            results[row_id] = (names.get(row_id), error)
+
+        if error is None:
+            for columns, rows in groups.items():
+                if not rows:
+                    continue
+                written = pd.DataFrame([values for _, values in rows], columns=['ROW_ID', *columns, 'TIMESTAMP'])
+                _write_through(written.assign(TIMESTAMP=pd.Timestamp(timestamp)), tag)
+
+    return [results[row_id] for row_id in patches]
+
+
+# Insert one new closer row. `row` maps lm_appointments columns to values;
+# ROW_ID is required. The row is written through to the appointment store
+# once Snowflake accepts it.
+def add_appointment(row, tag=None):
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    row = {**row, 'TIMESTAMP': timestamp}
+    columns = ", ".join(row)
+    execute(f"INSERT INTO {APPOINTMENTS_TABLE} ({columns}) VALUES ({placeholders(len(row))})", tag=tag, params=list(row.values()))
+    _write_through(pd.DataFrame([{**row, 'TIMESTAMP': pd.Timestamp(timestamp)}]), tag)
+
+
+# Snowflake already holds the rows, so a failure here only costs the local
+# copy: the version bump makes the next read pick them up with a delta load
+# instead of reporting a committed save as failed
+def _write_through(rows, tag):
+    try:
+        get_appointment_store().write_through(rows, tag=tag)
+    except Exception as e:
+        print(f"Appointment write-through failed: {e}")
+        bump('appointments')
+
+
+# Process-wide copy of lm_appointments kept current with delta loads.
+#
+# The first load pulls every live row; after that only rows whose TIMESTAMP
+# is at or past the high-water mark are fetched and upserted by ROW_ID, and
+# rows that came back soft-deleted are dropped from the snapshot. A bump of
+# the 'appointments' version triggers a delta load on the next read.
+#
+# Every load is also written to the 'appointments' disk snapshot. A fresh
+# process starts from that snapshot and runs its first delta in the
+# background, so the first viewer doesn't wait on Snowflake.
+#
+# Our own confirmed writes don't wait for a delta at all: write_through
+# patches them into the frame and the snapshot, bumps the version for the
+# other readers of the table, and reconciles with Snowflake in the background.
+class AppointmentStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+        self._high_water = None
+        self._loaded_at = 0
+        self._checked_at = 0
+        self._seen_version = None
+        self._refreshing = False
+
+    def load(self, tag=None):
+        # While a background delta runs, serve the frame we already have
+        if self._refreshing and self._frame is not None:
+            record_cache('appointments', hit=True)
+            return self._frame.copy()
+
+        with self._lock:
+            now = time.monotonic()
+            current_version = version('appointments')
+            hit = False
+            if self._frame is None and self._seed_from_snapshot():
+                self._seen_version = current_version
+                self._refresh_in_background(tag)
+                hit = True
+            elif self._frame is None or now - self._loaded_at > FULL_RELOAD_INTERVAL:
+                self._full_load(tag)
+            elif current_version != self._seen_version or now - self._checked_at > REFRESH_INTERVAL:
+                self._delta_load(tag)
+            else:
+                hit = True
+            self._seen_version = current_version
+            record_cache('appointments', hit)
+            return self._frame.copy()
+
+    # Apply rows we just wrote to Snowflake. `rows` holds raw column values
+    # keyed on ROW_ID, with the same columns for every row: a patch for rows
+    # already in the frame, every column for new ones. Rows written as
+    # deleted are dropped. A patch for a row the frame no longer holds (a
+    # delta dropped it meanwhile) is left to the background delta.
+    def write_through(self, rows, tag=None):
+        updates = typed_frame(rows, APPOINTMENTS_SCHEMA).drop_duplicates('ROW_ID', keep='last').set_index('ROW_ID')
+        with self._lock:
+            if self._frame is not None:
+                frame = self._frame.copy()
+                existing = frame['ROW_ID'].isin(updates.index).to_numpy()
+                for column in updates.columns:
+                    values = updates[column].reindex(frame.loc[existing, 'ROW_ID']).to_numpy()
+                    if isinstance(frame[column].dtype, pd.CategoricalDtype):
+                        categories = frame[column].cat.categories
+                        unseen = pd.Index(pd.unique(values)).dropna().difference(categories)
+                        if len(unseen):
+                            frame[column] = frame[column].cat.add_categories(unseen.astype(categories.dtype))
+                    frame.loc[existing, column] = values
+
+                added = updates[~updates.index.isin(frame['ROW_ID'])].reset_index()
+                if not added.empty and set(frame.columns) <= set(added.columns):
+                    frame = concat_typed([frame, added.reindex(columns=frame.columns)])
+                self._frame = frame[~frame['IS_DELETED']].reset_index(drop=True)
+                self._save_snapshot()
+
+            bump('appointments')
+            self._seen_version = version('appointments')
+        self._refresh_in_background(tag)
+
+    def _full_load(self, tag):
+        columns = ", ".join(LOAD_COLUMNS)
+        df = query_typed(f"SELECT {columns} FROM {APPOINTMENTS_TABLE} WHERE {NOT_DELETED}", APPOINTMENTS_SCHEMA, tag=tag)
+        self._frame = df.reset_index(drop=True)
+        self._high_water = df['TIMESTAMP'].max() if not df.empty else None
+        self._loaded_at = self._checked_at = time.monotonic()
+        self._save_snapshot()
+
+    def _delta_load(self, tag):
+        if self._high_water is None or pd.isna(self._high_water):
+            self._full_load(tag)
+            return
+
+        columns = ", ".join(LOAD_COLUMNS)
+        since = str(pd.Timestamp(self._high_water))
+        delta = query_typed(f"""
+            SELECT {columns} FROM {APPOINTMENTS_TABLE}
+            WHERE TIMESTAMP >= DATEADD(minute, -{DELTA_OVERLAP_MINUTES}, CAST(? AS TIMESTAMP_NTZ))
+        """, APPOINTMENTS_SCHEMA, tag=tag, params=[since])
+        self._checked_at = time.monotonic()
+        if delta.empty:
+            return
+
+        kept = self._frame[~self._frame['ROW_ID'].isin(delta['ROW_ID'])]
+        self._frame = concat_typed([kept, delta[~delta['IS_DELETED']]])
+        self._high_water = max(self._high_water, delta['TIMESTAMP'].max())
+        self._save_snapshot()
+
+    def _seed_from_snapshot(self):
+        df, _ = load_snapshot(SNAPSHOT_NAME)
+        if df is None:
+            return False
+        self._frame = df
+        self._high_water = df['TIMESTAMP'].max() if not df.empty else None
+        self._loaded_at = time.monotonic()
+        self._checked_at = 0
+        return True
+
+    def _save_snapshot(self):
+        try:
+            save_snapshot(SNAPSHOT_NAME, self._frame)
+        except Exception as e:
+            print(f"Could not write appointments snapshot: {e}")
+
+    def _refresh_in_background(self, tag):
+        self._refreshing = True
+
+        def refresh():
+            try:
+                with self._lock:
+                    self._delta_load(tag)
+            except Exception as e:
+                print(f"Background appointments refresh failed: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name="appointments-refresh", daemon=True).start()
+
+
+@st.cache_resource(show_spinner=False)
+def get_appointment_store():
+    return AppointmentStore()
@@ -0,0 +1,197 @@
+import html
+
+import numpy as np
+import streamlit as st
+
+from components.images import picture_sources
+
+CARD_PICTURE_SIZE = 56  # drawn at 28px, so sharp on 2x wall displays
+SPARKLINE_WIDTH = 100
+SPARKLINE_HEIGHT = 24
+
+BOARD_CSS = """
+<style>
+.css-18e3th9 {
+    padding-top: 0 !important;  /* Remove the space at the top */
+}
+.board {
+    display: grid;
+    grid-template-columns: repeat(2, minmax(0, 1fr));  /* Two market columns, like the old st.columns(2) */
+    gap: 0 2rem;
+    align-items: start;
+}
+.market-header {
+    font-size: 2rem;
+    font-weight: 600;
+    margin: 1rem 0 0.5rem 0;
+}
+.market-cards {
+    display: grid;
+    grid-template-columns: repeat(3, minmax(0, 1fr));  /* Cards per row */
+    gap: 0 1rem;
+}
+@media (max-width: 900px) {
+    .board {
+        grid-template-columns: minmax(0, 1fr);
+    }
+}
+@media (max-width: 500px) {
+    .market-cards {
+        grid-template-columns: minmax(0, 1fr);
+    }
+}
+.card {
+    background-color: #1e1e1e;
+    padding: 10px;
+    border-radius: 10px;
+    margin-bottom: 5px;
+    color: white;
+    position: relative;
+}
+.profile-section {
+    display: flex;
+    align-items: center;
+    margin-bottom: 8px;
+}
+.profile-pic {
+    border-radius: 50%;
+    width: 28px;
+    height: 28px;
+    margin-right: 15px;
+    flex-shrink: 0;
+    background-size: cover;
+    background-position: center;
+}
+.name {
+    font-size: 16px; /* Reduced from 18px for smaller titles */
+    font-weight: bold;
+}
+.appointments {
+    font-size: 16px;
+    margin-bottom: 10px;
+    color: white;
+}
+.progress-bar {
+    background-color: #333;
+    border-radius: 25px;
+    width: 100%;
+    height: 20px;
+    position: relative;
+    margin-bottom: 10px;
+}
+.progress-bar-fill {
+    background-color: #FF6347;
+    height: 100%;
+    border-radius: 25px;
+}
+.sparkline {
+    display: block;
+    width: 100%;
+    height: 24px;
+    margin-bottom: 8px;
+}
+.sparkline-line {
+    fill: none;
+    stroke: #47C547;
+    stroke-width: 1.5;
+    vector-effect: non-scaling-stroke;
+}
+.sparkline-goal {
+    stroke: #888;
+    stroke-width: 1;
+    stroke-dasharray: 3 3;
+    vector-effect: non-scaling-stroke;
+}
+.goal {
+    position: absolute;
+    right: 5px;
+    top: 50%;
+    transform: translateY(-50%);
+    font-size: 16px;
+    color: white;
+    font-weight: bold;
+}
+</style>
+"""
+
+
+def _escaped(series):
+    return series.astype(str).map(html.escape)
+
+
+# One CSS class per distinct picture, so a picture shared by many closers
+# (usually the default one) is inlined once per board rather than per card.
+# Returns (style rules, class name per row of `df`).
+def picture_classes(df):
+    urls = df['PROFILE_PICTURE'].astype(object)
+    sources = picture_sources(urls.unique(), CARD_PICTURE_SIZE)
+    classes = {url: f"pic-{i}" for i, url in enumerate(sources)}
+    # Percent-encode what could end the url() or the <style> element
+    rules = ''.join(
+        f'.{classes[url]} {{background-image: url("'
+        + str(source).replace('"', '%22').replace('<', '%3C').replace('>', '%3E')
+        + '");}'
+        for url, source in sources.items()
+    )
+    return rules, urls.map(classes)
+
+
+# One inline SVG per row of `matrix` (closers x weeks): the weekly counts as
+# a line and the weekly goal as a dashed one, scaled per closer to the larger
+# of the two. A single week has no trend, so it gets no sparkline.
+def sparklines(matrix, goals):
+    weeks = matrix.shape[1]
+    if weeks < 2:
+        return np.full(len(matrix), '', dtype=object)
+    scale = np.maximum(matrix.max(axis=1), goals).clip(min=1)
+    x = np.linspace(0, SPARKLINE_WIDTH, weeks)
+    y = SPARKLINE_HEIGHT - 2 - matrix / scale[:, None] * (SPARKLINE_HEIGHT - 4)
+    goal_y = SPARKLINE_HEIGHT - 2 - goals / scale * (SPARKLINE_HEIGHT - 4)
+    points = (' '.join(f"{px:.1f},{py:.1f}" for px, py in zip(x, row)) for row in y)
+    return np.array([
+        f'<svg class="sparkline" viewBox="0 0 {SPARKLINE_WIDTH} {SPARKLINE_HEIGHT}" preserveAspectRatio="none">'
+        f'<line class="sparkline-goal" x1="0" y1="{goal:.1f}" x2="{SPARKLINE_WIDTH}" y2="{goal:.1f}"/>'
+        f'<polyline class="sparkline-line" points="{line}"/></svg>'
+        for line, goal in zip(points, goal_y)
+    ], dtype=object)
+
+
+# HTML for every closer card, built column-wise over the whole frame.
+# Kept on one line per card: indented lines would turn into markdown code blocks.
+# A SPARKLINE column, when present, is drawn under the appointment count.
+def card_html(df, picture_class):
+    progress_color = np.where(df['PERCENTAGE_TO_GOAL'] < 100, "#FF6347", "#47C547")
+    sparkline = df['SPARKLINE'] if 'SPARKLINE' in df.columns else ''
+    return (
+        '<div class="card"><div class="profile-section">'
+        + '<div class="profile-pic ' + picture_class + '" role="img" aria-label="Profile Picture"></div>'
+        + '<div class="name">' + _escaped(df['NAME']) + '</div></div>'
+        + '<div class="appointments">' + df['APPOINTMENTS'].astype(str) + '</div>'
+        + sparkline
+        + '<div class="progress-bar"><div class="progress-bar-fill" style="width: '
+        + df['PERCENTAGE_TO_GOAL'].astype(str) + '%;background-color: ' + progress_color + ';"></div>'
+        + '<div class="goal">' + df['GOAL'].astype(str) + '</div></div></div>'
+    )
+
+
+# The whole board as one HTML document: a block per market, in MARKET order
+def board_html(df):
+    if df.empty:
+        return ''
+    # Group on plain values so markets come out in name order and
+    # categories with no rows after filtering don't produce empty blocks
+    market = df['MARKET'].astype(object)
+    picture_rules, picture_class = picture_classes(df)
+    cards = card_html(df, picture_class).groupby(market).agg(''.join)
+    notes = df['NOTES'].groupby(market).first().reindex(cards.index).fillna('')
+    blocks = (
+        '<div class="market"><div class="market-header" title="' + _escaped(notes) + '">'
+        + _escaped(cards.index.to_series()) + '</div>'
+        + '<div class="market-cards">' + cards + '</div></div>'
+    )
+    return '<style>' + picture_rules + '</style><div class="board">' + ''.join(blocks) + '</div>'
+
+
+# Send the board to the browser as a single element
+def render_board(df):
+    st.markdown(BOARD_CSS + board_html(df), unsafe_allow_html=True)
@@ -0,0 +1,285 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from components.cards import render_board
+from components.images import get_image_cache
+from components.history import MAX_WEEKS, history_board, trailing_weeks, week_range, weekly_counts
+from components.metrics import measured_rerun, rendering
+from components.refresher import Refresher
+from components.rollup import appointments_by_week_sql, refresh_rollup
+from components.schema import BOARD_SCHEMA
+from components.session import query_typed
+from components.sql import quote
+from components.timeframes import current_week_start, week_dimension_sql
+
+# Every appointment board the app serves. A channel picks which closers it
+# shows (TYPE), which goal and rank columns of lm_appointments it uses and
+# which Salesforce sales channel its appointments are counted from. Adding a
+# channel here plus a two-line page is all a new board needs.
+CHANNELS = {
+    'web': {
+        'types': ['🏠🏃 Hybrid', '🏠 Web To Home'],
+        'goal_column': 'GOAL',
+        'rank_column': 'RANK',
+        'sales_channel': 'Web To Home',
+    },
+    'field': {
+        'types': ['🏠🏃 Hybrid', '🏃 Field Marketing'],
+        'goal_column': 'FM_GOAL',
+        'rank_column': 'FM_RANK',
+        'sales_channel': 'Outside Sales',
+    },
+}
+
+
+def _channel_select(key, channel):
+    types = ", ".join(quote(t) for t in channel['types'])
+    return f"""
+    SELECT
+        '{key}' AS CHANNEL,
+        c.MARKET_GROUP,
+        c.MARKET_RANK,
+        c.NOTES,
+        c.{channel['goal_column']} AS GOAL,
+        c.MARKET,
+        c.TYPE,
+        c.{channel['rank_column']} AS RANK,
+        c.ACTIVE,
+        c.CLOSER_ID,
+        c.PROFILE_PICTURE,
+        c.NAME,
+        w.TIMEFRAME,
+        p.APPOINTMENTS
+    FROM closers c
+    CROSS JOIN weeks w
+    LEFT JOIN appointments p
+        ON p.CLOSER_ID = c.CLOSER_ID
+        AND p.TIMEFRAME = w.TIMEFRAME
+        AND p.CHANNEL = {quote(channel['sales_channel'])}
+    WHERE c.TYPE IN ({types})
+    """
+
+
+# Goals, appointment counts and progress for every channel and timeframe in
+# one query, already in render order. Nothing in it reads the clock: the
+# week key is its one bind parameter, so within a week identical refreshes
+# hit Snowflake's result cache.
+def board_query():
+    sales_channels = [channel['sales_channel'] for channel in CHANNELS.values()]
+    channel_selects = "\n    UNION ALL\n".join(_channel_select(key, channel) for key, channel in CHANNELS.items())
+    return f"""
+    WITH weeks AS (
+        {week_dimension_sql()}
+    ),
+    closers AS (
+        SELECT
+            b.MARKET_GROUP,
+            b.RANK AS MARKET_RANK,
+            b.NOTES,
+            a.GOAL,
+            a.FM_GOAL,
+            a.MARKET,
+            a.TYPE,
+            a.RANK,
+            a.FM_RANK,
+            a.ACTIVE,
+            a.CLOSER_ID,
+            a.PROFILE_PICTURE,
+            CONCAT(SPLIT_PART(a.NAME, ' ', 1), ' ', LEFT(SPLIT_PART(a.NAME, ' ', 2), 1), '.') AS NAME
+        FROM raw.snowflake.lm_appointments a
+        LEFT JOIN raw.snowflake.lm_markets b
+            ON a.MARKET = b.MARKET
+        WHERE a.ACTIVE = 'Yes'
+        AND (a.IS_DELETED != 'true' OR a.IS_DELETED IS NULL)
+    ),
+    appointments AS (
+        {appointments_by_week_sql(sales_channels)}
+    ),
+    board AS (
+        {channel_selects}
+    )
+    SELECT
+        b.*,
+        IFF(COALESCE(b.GOAL, 0) = 0, 100, LEAST(COALESCE(b.APPOINTMENTS, 0) / b.GOAL * 100, 100)) AS PERCENTAGE_TO_GOAL
+    FROM board b
+    ORDER BY b.CHANNEL, b.TIMEFRAME, b.MARKET_RANK, b.MARKET, COALESCE(b.RANK, 100)
+    """
+
+
+def _fetch_board_data():
+    # Fills and dtypes come from BOARD_SCHEMA at ingest
+    week_key = current_week_start().isoformat()
+    return query_typed(board_query(), BOARD_SCHEMA, tag="dashboard", params=[week_key])
+
+
+# Every reload folds new Salesforce changes into the rollup before reading
+# it, so the board's "Last updated" time is also how current its counts
+# are (refresh_rollup is two metadata reads when nothing has changed). A
+# failed refresh fails the reload, and the board keeps its last snapshot
+# and time. Thumbnails are fetched before publishing.
+#
+# The inline seed load of a cold process (seeding=True) reads the rollup as
+# it stands when the refresh fails, and never waits on picture hosts: cards
+# fall back to the picture URLs and switch to thumbnails on a later rerun,
+# once they have landed.
+def _load_board_data(seeding=False):
+    try:
+        refresh_rollup(tag="dashboard_rollup")
+    except Exception as e:
+        if not seeding:
+            raise
+        print(f"Appointment rollup refresh failed: {e}")
+    df = _fetch_board_data()
+    get_image_cache().warm(df['PROFILE_PICTURE'].unique(), wait=not seeding)
+    return df
+
+
+# One frame for every board, shared by all pages and viewers and kept
+# current by a single background refresher (see components.refresher)
+@st.cache_resource(show_spinner=False)
+def get_board_refresher():
+    return Refresher(
+        'board', _load_board_data, ('appointments', 'markets'),
+        columns=list(BOARD_SCHEMA), seed_loader=lambda: _load_board_data(seeding=True),
+    )
+
+
+# Range modes of the Timeframe filter, besides the TIMEFRAMES weeks
+LAST_N_WEEKS = 'Last N Weeks'
+DATE_RANGE = 'Date Range'
+
+
+def _int_param(query_params, name, default, low, high):
+    try:
+        return min(max(int(query_params.get(name, default)), low), high)
+    except (TypeError, ValueError):
+        return default
+
+
+# Rows of one board view, in render order, cached per published snapshot so
+# reruns with the same filters reuse the slice. Keyed by the snapshot's
+# fetch time; a new snapshot simply starts missing.
+VIEW_CACHE_SIZE = 64
+_views = OrderedDict()
+_views_lock = threading.Lock()
+
+
+def board_view(snapshot, channel_key, groups, timeframe):
+    key = (snapshot.fetched_at, channel_key, groups, timeframe)
+    with _views_lock:
+        if key in _views:
+            _views.move_to_end(key)
+            return _views[key]
+
+    df = snapshot.frame
+    mask = (df['CHANNEL'] == channel_key) & (df['TIMEFRAME'] == timeframe)
+    if 'All Groups' not in groups:
+        mask &= df['MARKET_GROUP'].isin(groups)
+    view = df[mask]
+
+    with _views_lock:
+        _views[key] = view
+        while len(_views) > VIEW_CACHE_SIZE:
+            _views.popitem(last=False)
+    return view
+
+
+def render_dashboard(channel_key):
+    st.set_page_config(
+        page_title="Appointment Dashboard",
+        layout="wide",
+        initial_sidebar_state="collapsed"
+    )
+
+    st.logo("https://i.ibb.co/bbH9pgH/Purelight-Logo.webp")
+
+    hide_streamlit_style = """
+        <style>
+        #MainMenu {visibility: hidden;}
+        footer {visibility: hidden;}
+        header {visibility: hidden;}
+        .css-10trblm {padding-top: 0px; padding-bottom: 0px;}
+        .css-1d391kg {padding-top: 0px !important;}
+        </style>
+    """
+    st.markdown(hide_streamlit_style, unsafe_allow_html=True)
+
+    with measured_rerun(f"dashboard:{channel_key}"):
+        # Every view is a cached slice of the shared, already sorted frame
+        snapshot = get_board_refresher().snapshot()
+        all_channels = snapshot.frame
+        group_options = sorted(all_channels.loc[all_channels['CHANNEL'] == channel_key, 'MARKET_GROUP'].unique())
+
+        # Sidebar filters with default values from query params
+        st.sidebar.title("Filters")
+
+        # Read query parameters
+        query_params = st.query_params
+
+        # Get default filter values from query params
+        default_selected_group = query_params.get('selected_group', ['All Groups'])
+        default_selected_timeframe = query_params.get('selected_timeframe', ['This Week'])[0]
+
+        # Ensure default_selected_timeframe is a valid option. The first three
+        # come straight from the shared board; the range modes sum the rollup.
+        valid_timeframes = ['This Week', 'Next Week', 'Last Week', LAST_N_WEEKS, DATE_RANGE]
+        if default_selected_timeframe not in valid_timeframes:
+            default_selected_timeframe = 'This Week'  # Set a fallback value
+
+        selected_group = st.sidebar.multiselect(
+            'Group',
+            ['All Groups'] + group_options,
+            default=default_selected_group,
+            key='group_multiselect'
+        )
+
+        selected_timeframe = st.sidebar.selectbox(
+            'Timeframe',
+            valid_timeframes,
+            index=valid_timeframes.index(default_selected_timeframe)  # Safe fallback is guaranteed here
+        )
+
+        week_span = None
+        if selected_timeframe == LAST_N_WEEKS:
+            weeks = st.sidebar.slider('Weeks', 2, MAX_WEEKS, _int_param(query_params, 'weeks', 12, 2, MAX_WEEKS))
+            week_span = trailing_weeks(weeks)
+        elif selected_timeframe == DATE_RANGE:
+            this_week = current_week_start()
+            dates = st.sidebar.date_input('Dates', value=(this_week - timedelta(weeks=3), this_week + timedelta(days=6)))
+            # Half-picked ranges come back as a single date
+            dates = tuple(dates) if isinstance(dates, (tuple, list)) else (dates,)
+            week_span = week_range(dates[0], dates[-1])
+            if week_span[1] > MAX_WEEKS:
+                st.sidebar.warning(f"Showing the first {MAX_WEEKS} weeks of the range.")
+                week_span = (week_span[0], MAX_WEEKS)
+
+        # Function to update query parameters
+        def update_query_params():
+            params = {
+                "selected_group": selected_group,
+                "selected_timeframe": selected_timeframe
+            }
+            if selected_timeframe == LAST_N_WEEKS:
+                params["weeks"] = week_span[1]
+            st.query_params = params
+
+        # Update query parameters when filters change
+        update_query_params()
+
+        groups = tuple(sorted(selected_group))
+        if week_span is None:
+            df_view = board_view(snapshot, channel_key, groups, selected_timeframe)
+        else:
+            # Every week of the range in one grouped query, reshaped in NumPy
+            first_week, weeks = week_span
+            counts = weekly_counts(CHANNELS[channel_key]['sales_channel'], first_week, weeks)
+            df_view = history_board(board_view(snapshot, channel_key, groups, 'This Week'), counts, weeks)
+            last_day = first_week + timedelta(weeks=weeks, days=-1)
+            st.caption(f"{weeks} weeks, {first_week:%b %d} – {last_day:%b %d, %Y}. Goals are weekly goals times {weeks}.")
+
+        with rendering():
+            render_board(df_view)
+        st.caption(f"Last updated {datetime.fromtimestamp(snapshot.fetched_at):%b %d, %I:%M %p}")
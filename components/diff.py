@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+
+# Values as the editor shows them: categoricals as plain values and text
+# stripped, so a padded or re-typed but identical cell isn't a change
+def _comparable(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if series.dtype == object:
+        series = series.map(lambda v: v.strip() if isinstance(v, str) else v)
+    return series
+
+
+# True where old and new differ (two missing values count as equal)
+def _differs(old, new):
+    old, new = _comparable(old), _comparable(new)
+    # Nullable dtypes compare to <NA>; treat that as "not equal" unless both are missing
+    same = (old == new).fillna(False).astype(bool) | (old.isna() & new.isna())
+    return ~same.to_numpy()
+
+# Compare two frames keyed on `key` without scanning row by row.
+#
+# Returns (added, removed, changed): rows only in `edited`, keys only in
+# `original`, and rows present in both where any of `columns` differs
+# (two missing values count as equal).
+def keyed_diff(original, edited, key, columns):
+    merged = original[[key] + columns].merge(
+        edited[[key] + columns],
+        on=key,
+        how='outer',
+        suffixes=('_ORIGINAL', ''),
+        indicator=True,
+    )
+
+    added = merged.loc[merged['_merge'] == 'right_only', [key] + columns]
+    removed = merged.loc[merged['_merge'] == 'left_only', [key]]
+
+    both = merged[merged['_merge'] == 'both']
+    differs = np.zeros(len(both), dtype=bool)
+    for column in columns:
+        differs |= _differs(both[f'{column}_ORIGINAL'], both[column])
+    changed = both.loc[differs, [key] + columns]
+
+    return (
+        added.reset_index(drop=True),
+        removed.reset_index(drop=True),
+        changed.reset_index(drop=True),
+    )
+
+
+# Column-level patches between two versions of the same rows, keyed on `key`.
+#
+# Every column is compared in one vectorized pass; only rows with at least
+# one changed cell are visited to build their patch. Returns a dict of
+# {key: {column: new value}} holding just the cells that changed, in the
+# order rows appear in `edited`. Keys missing from either frame are ignored.
+def column_patches(original, edited, key, columns):
+    merged = edited[[key] + columns].merge(
+        original[[key] + columns],
+        on=key,
+        how='inner',
+        suffixes=('', '_ORIGINAL'),
+    )
+    differs = np.column_stack([_differs(merged[f'{column}_ORIGINAL'], merged[column]) for column in columns])
+
+    patches = {}
+    for i in np.flatnonzero(differs.any(axis=1)):
+        row = merged.iloc[i]
+        patches[row[key]] = {column: row[column] for column, changed in zip(columns, differs[i]) if changed}
+    return patches
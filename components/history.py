@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from components.cards import sparklines
+from components.rollup import REFRESH_TTL, ROLLUP_TABLE, ensure_rollup_fresh
+from components.session import query_typed
+from components.timeframes import current_week_start
+
+# Appointments per closer and ISO week for one sales channel over a range of
+# weeks, straight from the rollup. WEEK is the week's position in the range,
+# so the result reshapes into a closer x week matrix without date handling.
+# Binds: range start (twice), sales channel, range end.
+WEEKLY_COUNTS_QUERY = f"""
+    SELECT
+        CLOSER_ID,
+        DATEDIFF(day, TO_DATE(?), WEEK_START) / 7 AS WEEK,
+        SUM(APPOINTMENTS) AS APPOINTMENTS
+    FROM {ROLLUP_TABLE}
+    WHERE CHANNEL = ?
+    AND WEEK_START >= TO_DATE(?)
+    AND WEEK_START < TO_DATE(?)
+    AND CLOSER_ID IS NOT NULL
+    GROUP BY CLOSER_ID, WEEK_START
+"""
+
+WEEKLY_COUNTS_SCHEMA = {
+    'CLOSER_ID': ('string', None),
+    'WEEK': ('int16', 0),
+    'APPOINTMENTS': ('int32', 0),
+}
+
+MAX_WEEKS = 52
+
+
+# (first Monday, number of weeks) for the ISO weeks overlapping start..end
+def week_range(start, end):
+    first = current_week_start(min(start, end))
+    last = current_week_start(max(start, end))
+    return first, (last - first).days // 7 + 1
+
+
+# The `weeks` weeks up to and including the current one
+def trailing_weeks(weeks):
+    return current_week_start() - timedelta(weeks=weeks - 1), weeks
+
+
+# One query however many weeks are asked for. Cached per range for as long
+# as the rollup itself, so every viewer of a range shares the result.
+@st.cache_data(ttl=REFRESH_TTL, show_spinner=False)
+def weekly_counts(sales_channel, first_week, weeks):
+    ensure_rollup_fresh()
+    end = first_week + timedelta(weeks=weeks)
+    return query_typed(
+        WEEKLY_COUNTS_QUERY, WEEKLY_COUNTS_SCHEMA, tag="dashboard_history",
+        params=[first_week.isoformat(), sales_channel, first_week.isoformat(), end.isoformat()],
+    )
+
+
+# Scatter the long-form counts into one row per `closer_ids` entry and one
+# column per week. The matrix carries a trailing row of zeros, which is
+# where closers missing from the counts (get_indexer's -1) land. A range
+# with no rollup rows (in the future, before the history, a new channel)
+# is all zeros.
+def weekly_matrix(counts, closer_ids, weeks):
+    if counts.empty:
+        return np.zeros((len(closer_ids), weeks), dtype=np.int32)
+    ids = pd.Index(closer_ids.dropna().unique())
+    rows = ids.get_indexer(counts['CLOSER_ID'])
+    columns = counts['WEEK'].to_numpy(dtype=np.int64)
+    keep = (rows >= 0) & (columns >= 0) & (columns < weeks)
+
+    matrix = np.zeros((len(ids) + 1, weeks), dtype=np.int32)
+    np.add.at(matrix, (rows[keep], columns[keep]), counts['APPOINTMENTS'].to_numpy()[keep])
+    return matrix[ids.get_indexer(closer_ids)]
+
+
+# A board for a range of weeks: the closers of the current board with their
+# appointments summed over the range, their weekly goal scaled to it and a
+# sparkline of the weeks in between
+def history_board(closers, counts, weeks):
+    matrix = weekly_matrix(counts, closers['CLOSER_ID'], weeks)
+    weekly_goals = closers['GOAL'].to_numpy(dtype=np.int32)
+    goals = weekly_goals * weeks
+    totals = matrix.sum(axis=1)
+    return closers.assign(
+        APPOINTMENTS=totals,
+        GOAL=goals,
+        PERCENTAGE_TO_GOAL=np.where(goals == 0, 100, np.minimum(totals / np.maximum(goals, 1) * 100, 100)),
+        SPARKLINE=sparklines(matrix, weekly_goals),
+    )
@@ -0,0 +1,190 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+import streamlit as st
+from PIL import Image
+
+# Profile pictures fetched once, cut down to small square thumbnails and
+# kept on disk, so boards inline them instead of every browser pulling
+# full-size images from third-party hosts on every paint.
+IMAGE_DIR = Path(os.environ.get("LM_IMAGE_DIR", ".cache/images"))
+THUMBNAIL_SIZES = (28, 56)          # 1x and 2x of the 28px avatar
+MAX_CACHE_BYTES = 50 * 1024 * 1024  # least recently used thumbnails go first
+FETCH_TIMEOUT = 5                   # seconds per picture
+FETCH_WORKERS = 8
+RETRY_FAILED_AFTER = 15 * 60        # don't hammer a host that just failed
+
+
+def fetch_url(url):
+    response = requests.get(url, timeout=FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+
+# Centre-crop to a square, so round avatars aren't squashed, and shrink
+def thumbnail(data, size):
+    image = Image.open(io.BytesIO(data)).convert('RGBA')
+    side = min(image.size)
+    left, top = (image.width - side) // 2, (image.height - side) // 2
+    image = image.crop((left, top, left + side, top + side)).resize((size, size), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, format='WEBP', quality=80)
+    return out.getvalue()
+
+
+# Thumbnails are stored as <sha256 of the original>-<size>.webp, so closers
+# sharing a picture (most share the default one) share the files. index.json
+# maps each picture URL to its content hash.
+#
+# `fetcher` takes a URL and returns the image bytes; pass another one to run
+# without the network.
+class ImageCache:
+    def __init__(self, fetcher=fetch_url, directory=IMAGE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self._fetcher = fetcher
+        self._dir = Path(directory)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = self._read_index()  # url -> content hash
+        self._uris = {}                   # (url, size) -> data URI
+        self._failed = {}                 # url -> time of the last failed fetch
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="image-fetch")
+
+    # The thumbnail of `url` as a data URI, from memory or disk only.
+    # None when the picture hasn't been fetched yet.
+    def data_uri(self, url, size):
+        uri = self._uris.get((url, size))
+        if uri is not None:
+            return uri
+        digest = self._index.get(url)
+        if digest is None:
+            return None
+        path = self._path(digest, size)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # recently used, for eviction
+        except OSError:
+            return None
+        uri = 'data:image/webp;base64,' + base64.b64encode(data).decode('ascii')
+        self._uris[(url, size)] = uri
+        return uri
+
+    # Fetch the pictures in `urls` that aren't cached yet on the worker pool.
+    # Returns immediately unless `wait` is set.
+    def warm(self, urls, wait=False):
+        now = time.time()
+        with self._lock:
+            missing = [
+                url for url in dict.fromkeys(urls)
+                if isinstance(url, str) and url
+                and url not in self._index
+                and url not in self._pending
+                and now - self._failed.get(url, 0) > RETRY_FAILED_AFTER
+            ]
+            self._pending.update(missing)
+        futures = [self._executor.submit(self._fetch, url) for url in missing]
+        if wait:
+            for future in futures:
+                future.result()
+
+    def _fetch(self, url):
+        try:
+            data = self._fetcher(url)
+            digest = hashlib.sha256(data).hexdigest()
+            self._dir.mkdir(parents=True, exist_ok=True)
+            for size in THUMBNAIL_SIZES:
+                path = self._path(digest, size)
+                if not path.exists():
+                    self._write_atomic(path, thumbnail(data, size))
+            with self._lock:
+                self._index[url] = digest
+                self._failed.pop(url, None)
+                self._write_index()
+            self._evict()
+        except Exception as e:
+            with self._lock:
+                self._failed[url] = time.time()
+            print(f"Could not cache picture {url}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+
+    def _evict(self):
+        files = []
+        for path in self._dir.glob('*.webp'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        if total <= self._max_bytes:
+            return
+
+        for _, size, path in sorted(files):
+            if total <= self._max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+        # Forget pictures that lost a thumbnail, so they are fetched again
+        with self._lock:
+            for url, digest in list(self._index.items()):
+                if not all(self._path(digest, size).exists() for size in THUMBNAIL_SIZES):
+                    del self._index[url]
+                    for size in THUMBNAIL_SIZES:
+                        self._uris.pop((url, size), None)
+            self._write_index()
+
+    def _path(self, digest, size):
+        return self._dir / f"{digest}-{size}.webp"
+
+    def _read_index(self):
+        try:
+            return json.loads((self._dir / 'index.json').read_text())
+        except Exception:
+            return {}
+
+    # Callers hold self._lock
+    def _write_index(self):
+        self._write_atomic(self._dir / 'index.json', json.dumps(self._index).encode())
+
+    # Each writer gets its own temporary file: fetches of two URLs with the
+    # same picture, or two processes sharing the directory, can write the
+    # same path at once
+    def _write_atomic(self, path, data):
+        with tempfile.NamedTemporaryFile(dir=self._dir, prefix=f"{path.name}.", suffix='.tmp', delete=False) as f:
+            tmp = Path(f.name)
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_image_cache():
+    return ImageCache()
+
+
+# {url: src} for each distinct picture: the cached thumbnail as a data URI,
+# or the URL itself until its thumbnail has been fetched in the background
+def picture_sources(urls, size):
+    cache = get_image_cache()
+    urls = list(dict.fromkeys(urls))
+    cache.warm(urls)
+    return {url: cache.data_uri(url, size) or url for url in urls}
+
+
+# `series` of picture URLs with every cached one replaced by its thumbnail
+def inline_pictures(series, size):
+    return series.map(picture_sources(series.dropna().unique(), size))
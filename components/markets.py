@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pandas as pd
+
+from components.diff import keyed_diff
+from components.session import execute
+from components.sql import json_rows, json_rows_source
+
+MARKETS_TABLE = "raw.snowflake.lm_markets"
+MARKET_COLUMNS = ['MARKET_GROUP', 'RANK', 'NOTES']
+
+# Staged changeset columns, in row order, with their Snowflake types
+STAGED_COLUMNS = [
+    ('OP', 'VARCHAR'),
+    ('MARKET', 'VARCHAR'),
+    ('MARKET_GROUP', 'VARCHAR'),
+    ('RANK', 'NUMBER'),
+    ('NOTES', 'VARCHAR'),
+    ('TIMESTAMP', 'TIMESTAMP_NTZ'),
+]
+
+
+# Check the edited market table as a whole; returns a list of error messages
+def validate_markets(edited):
+    errors = []
+    names = edited['MARKET'].astype('string').str.strip()
+
+    if (names.isna() | (names == '')).any():
+        errors.append("Market name cannot be empty.")
+
+    duplicated = names[names.duplicated() & names.notna() & (names != '')].unique()
+    for market in duplicated:
+        errors.append(f"Market '{market}' is listed more than once.")
+
+    rank = edited['RANK']
+    blank = rank.isna() | (rank.astype('string').str.strip() == '')
+    numeric = pd.to_numeric(rank, errors='coerce')
+    invalid = ~blank & (numeric.isna() | (numeric % 1 != 0))
+    for market in edited.loc[invalid, 'MARKET']:
+        errors.append(f"Invalid rank value for market '{market}'. Rank must be an integer.")
+
+    return errors
+
+
+# Work out the full market changeset as one frame with an OP column:
+# I(nsert), U(pdate) or D(elete)
+def market_changeset(original, edited):
+    added, removed, changed = keyed_diff(original, edited, 'MARKET', MARKET_COLUMNS)
+    changeset = pd.concat(
+        [
+            removed.assign(OP='D'),
+            added.assign(OP='I'),
+            changed.assign(OP='U'),
+        ],
+        ignore_index=True,
+    )
+    return changeset.reindex(columns=['OP', 'MARKET'] + MARKET_COLUMNS)
+
+
+def _staged_rows(changeset, timestamp):
+    group = changeset['MARKET_GROUP'].fillna('').astype(str)
+    notes = changeset['NOTES'].fillna('').astype(str)
+    rank = pd.to_numeric(changeset['RANK'], errors='coerce').astype('Int64')
+    rows = []
+    for op, market, market_group, rank_value, note in zip(changeset['OP'], changeset['MARKET'], group, rank, notes):
+        if op == 'D':
+            rows.append((op, market, None, None, None, timestamp))
+        else:
+            rows.append((op, market, market_group, None if pd.isna(rank_value) else int(rank_value), note, timestamp))
+    return rows
+
+
+# The staged rows are bound as one JSON parameter, so the text never changes
+MARKET_MERGE = f"""
+    MERGE INTO {MARKETS_TABLE} AS target
+    USING (
+        {json_rows_source(STAGED_COLUMNS)}
+    ) AS source
+    ON target.MARKET = source.MARKET
+    WHEN MATCHED AND source.OP = 'D' THEN
+        DELETE
+    WHEN MATCHED AND source.OP = 'U' THEN
+        UPDATE SET
+            MARKET_GROUP = source.MARKET_GROUP,
+            RANK = source.RANK,
+            NOTES = source.NOTES,
+            TIMESTAMP = source.TIMESTAMP
+    WHEN NOT MATCHED AND source.OP = 'I' THEN
+        INSERT (MARKET, MARKET_GROUP, RANK, NOTES, TIMESTAMP)
+        VALUES (source.MARKET, source.MARKET_GROUP, source.RANK, source.NOTES, source.TIMESTAMP);
+"""
+
+
+# Apply every market change in one MERGE, or none of them.
+#
+# Returns (messages, errors). When any row fails validation nothing is sent
+# to Snowflake; otherwise the single MERGE either applies the whole
+# changeset or fails as a unit.
+def sync_markets(original, edited, tag=None):
+    original = original.reset_index(drop=True)
+    edited = edited.reset_index(drop=True)
+
+    errors = validate_markets(edited)
+    if errors:
+        return [], errors
+
+    changeset = market_changeset(original, edited)
+    if changeset.empty:
+        return [], []
+
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        staged_rows = json_rows(_staged_rows(changeset, timestamp), [name for name, _ in STAGED_COLUMNS])
+        execute(MARKET_MERGE, tag=tag, params=[staged_rows])
+    except Exception as e:
+        return [], [f"Error saving market changes: {str(e)}"]
+
+    verbs = {'D': 'Deleted market', 'I': 'Inserted new market', 'U': 'Updated market'}
+    messages = [f"{verbs[op]} '{market}'" for op, market in zip(changeset['OP'], changeset['MARKET'])]
+    return messages, []
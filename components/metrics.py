@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Timings for every Snowflake call, cache lookup and page rerun in this
+# process. The latest records are kept in memory for the diagnostics page,
+# and each one is also logged as a line of JSON on the 'lead_management.metrics'
+# logger.
+#
+# Queries are attributed to the rerun running on the same thread, so a
+# rerun's wall time splits into time waiting on Snowflake, time rendering
+# and everything else (mostly pandas).
+MAX_RECORDS = 500
+
+logger = logging.getLogger("lead_management.metrics")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(os.environ.get("LM_METRICS_LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+
+# Log event name for each kind of record
+EVENTS = {'queries': 'query', 'caches': 'cache', 'reruns': 'rerun'}
+
+_current = threading.local()
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = deque(maxlen=MAX_RECORDS)
+        self.caches = deque(maxlen=MAX_RECORDS)
+        self.reruns = deque(maxlen=MAX_RECORDS)
+
+    def add(self, kind, record):
+        with self._lock:
+            getattr(self, kind).append(record)
+        logger.info(json.dumps({'event': EVENTS[kind], **record}, default=str))
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.queries), list(self.caches), list(self.reruns)
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics():
+    return Metrics()
+
+
+def _rerun():
+    return getattr(_current, 'rerun', None)
+
+
+# One Snowflake call. `cache` is 'miss' for a call that ran, or 'coalesced'
+# for one served by an identical call already in flight.
+def record_query(label, query_tag, seconds, rows, nbytes, cache='miss'):
+    rerun = _rerun()
+    if rerun is not None:
+        rerun['queries'] += 1
+        rerun['query_seconds'] += seconds
+    get_metrics().add('queries', {
+        'at': time.time(),
+        'label': label,
+        'query_tag': query_tag,
+        'seconds': round(seconds, 4),
+        'rows': rows,
+        'bytes': nbytes,
+        'cache': cache,
+        'page': rerun['page'] if rerun else None,
+    })
+
+
+# A read served (hit) or not served (miss) by one of the app's caches
+def record_cache(name, hit):
+    rerun = _rerun()
+    get_metrics().add('caches', {
+        'at': time.time(),
+        'cache': name,
+        'hit': hit,
+        'page': rerun['page'] if rerun else None,
+    })
+
+
+# Pages use measured_rerun(), which pairs these even when the script raises
+def begin_rerun(page):
+    _current.rerun = {
+        'page': page,
+        'started': time.perf_counter(),
+        'queries': 0,
+        'query_seconds': 0.0,
+        'render_seconds': 0.0,
+    }
+
+
+def end_rerun(outcome='completed'):
+    rerun = _rerun()
+    if rerun is None:
+        return
+    _current.rerun = None
+    wall = time.perf_counter() - rerun['started']
+    get_metrics().add('reruns', {
+        'at': time.time(),
+        'page': rerun['page'],
+        'wall_seconds': round(wall, 4),
+        'query_seconds': round(rerun['query_seconds'], 4),
+        'render_seconds': round(rerun['render_seconds'], 4),
+        'other_seconds': round(wall - rerun['query_seconds'] - rerun['render_seconds'], 4),
+        'queries': rerun['queries'],
+        'outcome': outcome,
+    })
+
+
+# Time one page rerun however it ends. st.rerun(), st.stop() and errors all
+# end the script by raising, so a plain end_rerun() at the bottom of a page
+# would miss them; the exception's name is recorded as the outcome.
+@contextmanager
+def measured_rerun(page):
+    begin_rerun(page)
+    outcome = 'completed'
+    try:
+        yield
+    except BaseException as e:
+        outcome = type(e).__name__
+        raise
+    finally:
+        end_rerun(outcome)
+
+
+# Reads a rerun hands to other threads (components.parallel) record into a
+# worker copy of it. Their query times overlap, so waiting_on() adds the
+# workers' query counts to the rerun but the wall time spent waiting on
+# them as its query time.
+def worker_rerun():
+    rerun = _rerun()
+    return None if rerun is None else {**rerun, 'queries': 0, 'query_seconds': 0.0}
+
+
+@contextmanager
+def attached(rerun):
+    previous = _rerun()
+    _current.rerun = rerun
+    try:
+        yield
+    finally:
+        _current.rerun = previous
+
+
+@contextmanager
+def waiting_on(workers):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        rerun = _rerun()
+        if rerun is not None:
+            rerun['queries'] += sum(worker['queries'] for worker in workers if worker is not None)
+            rerun['query_seconds'] += time.perf_counter() - start
+
+
+# Count the enclosed block as rendering time for the current rerun
+@contextmanager
+def rendering():
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        rerun = _rerun()
+        if rerun is not None:
+            rerun['render_seconds'] += time.perf_counter() - start
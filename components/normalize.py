@@ -0,0 +1,43 @@
+import pandas as pd
+
+VALID_TYPES = ['🏠🏃 Hybrid', '🏃 Field Marketing', '🏠 Web To Home']
+DEFAULT_TYPE = '🏠🏃 Hybrid'
+DEFAULT_MARKET = 'No Market'
+
+REPORT_COLUMNS = ['ROW', 'NAME', 'COLUMN', 'VALUE', 'REPLACED_WITH']
+
+
+def _coerced(df, mask, column, name_column, replacement):
+    return pd.DataFrame({
+        'ROW': df.index[mask],
+        'NAME': df.loc[mask, name_column].astype(object).to_numpy(),
+        'COLUMN': column,
+        'VALUE': df.loc[mask, column].astype(object).to_numpy(),
+        'REPLACED_WITH': replacement,
+    })
+
+
+# Clean TYPE (and MARKET, when `valid_markets` is given) on closer target rows.
+#
+# Values outside the valid sets are replaced with the defaults using set
+# lookups over whole columns, and both columns come back categorical with
+# the valid values as categories, ready for the data editor's select
+# boxes. Returns (df, report) where report lists every replaced value.
+def normalize_closer_rows(df, valid_markets=None, name_column='FULL_NAME'):
+    df = df.copy()
+    reports = []
+
+    types = df['TYPE'].astype(object)
+    bad_type = ~types.isin(VALID_TYPES)
+    reports.append(_coerced(df, bad_type, 'TYPE', name_column, DEFAULT_TYPE))
+    df['TYPE'] = pd.Categorical(types.where(~bad_type, DEFAULT_TYPE), categories=VALID_TYPES)
+
+    if valid_markets is not None:
+        market_categories = sorted(set(pd.Series(valid_markets).dropna()) | {DEFAULT_MARKET})
+        markets = df['MARKET'].astype(object)
+        bad_market = ~markets.isin(market_categories)
+        reports.append(_coerced(df, bad_market, 'MARKET', name_column, DEFAULT_MARKET))
+        df['MARKET'] = pd.Categorical(markets.where(~bad_market, DEFAULT_MARKET), categories=market_categories)
+
+    report = pd.concat(reports, ignore_index=True).reindex(columns=REPORT_COLUMNS)
+    return df, report
@@ -0,0 +1,44 @@
+import threading
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from components.metrics import attached, waiting_on, worker_rerun
+
+
+# Run a page's independent reads at the same time and return their results
+# in order, so the page waits for the slowest read instead of all of them
+# in turn.
+#
+# Each call gets its own thread carrying the rerun's Streamlit context, so
+# st.cache_data, st.cache_resource and the metrics work as on the page
+# thread. The session pool (components.session) bounds how many of them talk
+# to Snowflake at once. The first exception raised by a call is re-raised
+# here once every call has finished.
+def gather(*calls):
+    ctx = get_script_run_ctx()
+    results = [None] * len(calls)
+    errors = [None] * len(calls)
+    workers = [worker_rerun() for _ in calls]
+
+    def run(index, call):
+        try:
+            with attached(workers[index]):
+                results[index] = call()
+        except BaseException as e:
+            errors[index] = e
+
+    threads = [
+        threading.Thread(target=run, args=(index, call), name=f"gather-{index}", daemon=True)
+        for index, call in enumerate(calls)
+    ]
+    with waiting_on(workers):
+        for thread in threads:
+            add_script_run_ctx(thread, ctx)
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    for error in errors:
+        if error is not None:
+            raise error
+    return results
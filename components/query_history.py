@@ -0,0 +1,30 @@
+import streamlit as st
+
+from components.session import QUERY_TAG_PREFIX, query_df
+
+# How many of the app's SELECTs Snowflake answered from its persisted result
+# cache, per query tag, over the last `hours`. Query history has no explicit
+# reuse flag; a SELECT that scanned no bytes was served from the result
+# cache (or from metadata alone, which also leaves the warehouse idle).
+RESULT_CACHE_QUERY = f"""
+    SELECT
+        QUERY_TAG,
+        COUNT(*) AS QUERIES,
+        COUNT_IF(BYTES_SCANNED = 0) AS RESULT_CACHE_HITS,
+        RESULT_CACHE_HITS / QUERIES AS HIT_RATE,
+        MEDIAN(TOTAL_ELAPSED_TIME) / 1000 AS SECONDS_P50
+    FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY(
+        END_TIME_RANGE_START => DATEADD(hour, -?, CURRENT_TIMESTAMP()),
+        RESULT_LIMIT => 10000
+    ))
+    WHERE QUERY_TAG LIKE '{QUERY_TAG_PREFIX}%'
+    AND QUERY_TYPE = 'SELECT'
+    AND EXECUTION_STATUS = 'SUCCESS'
+    GROUP BY QUERY_TAG
+    ORDER BY QUERIES DESC
+"""
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def result_cache_stats(hours=24):
+    return query_df(RESULT_CACHE_QUERY, tag="diagnostics", params=[hours])
@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from components.metrics import record_cache
+from components.snapshots import load_snapshot, save_snapshot
+from components.versions import versions
+
+# How often the process-level refreshers reload, by local server time. Wall
+# displays run all day, but the data only moves while the sales floor works.
+BUSINESS_HOURS = tuple(int(h) for h in os.environ.get("LM_BUSINESS_HOURS", "7-21").split("-"))
+BUSINESS_HOURS_INTERVAL = int(os.environ.get("LM_REFRESH_SECONDS", 60))
+OFF_HOURS_INTERVAL = int(os.environ.get("LM_OFF_HOURS_REFRESH_SECONDS", 15 * 60))
+# A refresher nobody has read for this many intervals stops reloading
+IDLE_INTERVALS = 2
+
+# What readers get: the frame, when it was fetched (epoch seconds) and the
+# table versions it reflects (None for a frame read back from disk).
+# Published snapshots are never modified; readers filter, they don't assign.
+Snapshot = namedtuple('Snapshot', ['frame', 'fetched_at', 'versions'])
+
+
+def refresh_interval(now=None):
+    hour = datetime.fromtimestamp(now if now is not None else time.time()).hour
+    start, end = BUSINESS_HOURS
+    return BUSINESS_HOURS_INTERVAL if start <= hour < end else OFF_HOURS_INTERVAL
+
+
+# One background thread per dataset that reloads it on refresh_interval()
+# and publishes the result as a Snapshot. Every session reads the latest
+# published snapshot, so any number of open boards cost one query per
+# interval.
+#
+# A cold process publishes the disk snapshot first and reloads right away;
+# a disk snapshot missing any of `columns` (from an older release) is
+# ignored. With no disk snapshot the first load runs inline on the viewer's
+# thread, through `seed_loader` when given: it should skip anything slow
+# the background loads can afford to wait for.
+# When a write bumps one of `tables`, the next reader wakes the thread early
+# and keeps serving the current snapshot until the new one is published.
+# With no readers for IDLE_INTERVALS intervals the thread parks, so an app
+# nobody has open sends no queries; the next reader gets the last snapshot
+# and wakes it.
+class Refresher:
+    def __init__(self, name, loader, tables, columns=None, seed_loader=None):
+        self._name = name
+        self._loader = loader
+        self._seed_loader = seed_loader or loader
+        self._tables = tables
+        self._columns = columns or []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._snapshot = None
+        self._thread = None
+        self._read_at = time.monotonic()
+        self._parked = False
+
+    def snapshot(self):
+        self._read_at = time.monotonic()
+        hit = self._snapshot is not None
+        if not hit:
+            with self._lock:
+                if self._snapshot is None:
+                    self._seed()
+        self._start()
+        record_cache(f"refresher:{self._name}", hit)
+
+        current = self._snapshot
+        stale = time.time() - current.fetched_at > refresh_interval()
+        if current.versions != versions(*self._tables) or (self._parked and stale):
+            self._wake.set()
+        return current
+
+    def _seed(self):
+        df, metadata = load_snapshot(self._name)
+        if df is not None and all(column in df.columns for column in self._columns):
+            self._snapshot = Snapshot(df, metadata['saved_at'], None)
+            self._wake.set()
+        else:
+            self._refresh(self._seed_loader)
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"refresher-{self._name}", daemon=True)
+                self._thread.start()
+
+    def _idle(self):
+        return time.monotonic() - self._read_at > IDLE_INTERVALS * refresh_interval()
+
+    def _run(self):
+        while True:
+            self._parked = self._idle()
+            woken = self._wake.wait(timeout=None if self._parked else refresh_interval())
+            self._parked = False
+            self._wake.clear()
+            if not woken and self._idle():
+                continue
+            try:
+                with self._lock:
+                    self._refresh()
+            except Exception as e:
+                print(f"Refresh of '{self._name}' failed: {e}")
+
+    def _refresh(self, loader=None):
+        # Read the versions first, so a write during the load triggers another
+        seen = versions(*self._tables)
+        df = (loader or self._loader)()
+        self._snapshot = Snapshot(df, time.time(), seen)
+        try:
+            save_snapshot(self._name, df, versions=list(seen))
+        except Exception as e:
+            print(f"Could not write snapshot '{self._name}': {e}")
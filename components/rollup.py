@@ -0,0 +1,170 @@
+import threading
+
+import streamlit as st
+
+from components.session import collect, pooled_session
+from components.sql import quote
+
+# Appointments per closer, sales channel and ISO week, maintained from
+# raw.salesforce.opportunity by refresh_rollup().
+#
+# OPPORTUNITY_WEEKS remembers which (closer, channel, week) each opportunity
+# was last counted under, so when an opportunity is reassigned or
+# rescheduled both its old and its new bucket get recounted.
+OPPORTUNITY_WEEKS_TABLE = "raw.snowflake.lm_opportunity_weeks"
+ROLLUP_TABLE = "raw.snowflake.lm_appointment_rollup"
+REFRESH_TTL = 600
+# Salesforce rows can land after rows with a later SYSTEM_MODSTAMP, so each
+# run re-reads this far behind the high-water mark. Recounting is idempotent.
+MODSTAMP_OVERLAP_HOURS = 1
+
+_refresh_lock = threading.Lock()
+
+CREATE_TABLES = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {OPPORTUNITY_WEEKS_TABLE} (
+        OPPORTUNITY_ID VARCHAR,
+        CLOSER_ID VARCHAR,
+        CHANNEL VARCHAR,
+        WEEK_START DATE,
+        SYSTEM_MODSTAMP TIMESTAMP_NTZ
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+        CLOSER_ID VARCHAR,
+        CHANNEL VARCHAR,
+        WEEK_START DATE,
+        APPOINTMENTS NUMBER,
+        UPDATED_AT TIMESTAMP_NTZ
+    )
+    """,
+]
+
+# The newest modification in Salesforce and the newest one already counted.
+# Snowflake answers a bare MAX over a column from table metadata, so these
+# don't resume the warehouse.
+SOURCE_HIGH_WATER = "SELECT MAX(system_modstamp) AS MODSTAMP FROM raw.salesforce.opportunity"
+ROLLUP_HIGH_WATER = f"SELECT MAX(SYSTEM_MODSTAMP) AS MODSTAMP FROM {OPPORTUNITY_WEEKS_TABLE}"
+
+# Opportunities modified since the last run, with the ISO week they fall in.
+# Temporary tables are created before BEGIN because DDL commits an open
+# transaction in Snowflake.
+STAGE_CHANGES = f"""
+CREATE OR REPLACE TEMPORARY TABLE lm_rollup_changes AS
+SELECT
+    id OPPORTUNITY_ID,
+    owner_id CLOSER_ID,
+    sales_channel_c CHANNEL,
+    DATEADD(day, 1 - DAYOFWEEKISO(first_scheduled_close_start_date_time_c), first_scheduled_close_start_date_time_c::DATE) WEEK_START,
+    system_modstamp SYSTEM_MODSTAMP
+FROM raw.salesforce.opportunity
+WHERE system_modstamp >= (
+    SELECT DATEADD(hour, -{MODSTAMP_OVERLAP_HOURS}, COALESCE(MAX(SYSTEM_MODSTAMP), '1900-01-01'::TIMESTAMP_NTZ))
+    FROM {OPPORTUNITY_WEEKS_TABLE}
+)
+"""
+
+STAGE_KEYS = f"""
+CREATE OR REPLACE TEMPORARY TABLE lm_rollup_keys AS
+SELECT DISTINCT CLOSER_ID, CHANNEL, WEEK_START FROM (
+    SELECT CLOSER_ID, CHANNEL, WEEK_START FROM lm_rollup_changes
+    UNION ALL
+    SELECT w.CLOSER_ID, w.CHANNEL, w.WEEK_START
+    FROM {OPPORTUNITY_WEEKS_TABLE} w
+    JOIN lm_rollup_changes c ON w.OPPORTUNITY_ID = c.OPPORTUNITY_ID
+)
+WHERE WEEK_START IS NOT NULL
+"""
+
+APPLY_CHANGES = [
+    f"""
+    MERGE INTO {OPPORTUNITY_WEEKS_TABLE} AS target
+    USING lm_rollup_changes AS source
+    ON target.OPPORTUNITY_ID = source.OPPORTUNITY_ID
+    WHEN MATCHED THEN
+        UPDATE SET
+            CLOSER_ID = source.CLOSER_ID,
+            CHANNEL = source.CHANNEL,
+            WEEK_START = source.WEEK_START,
+            SYSTEM_MODSTAMP = source.SYSTEM_MODSTAMP
+    WHEN NOT MATCHED THEN
+        INSERT (OPPORTUNITY_ID, CLOSER_ID, CHANNEL, WEEK_START, SYSTEM_MODSTAMP)
+        VALUES (source.OPPORTUNITY_ID, source.CLOSER_ID, source.CHANNEL, source.WEEK_START, source.SYSTEM_MODSTAMP)
+    """,
+    f"""
+    DELETE FROM {ROLLUP_TABLE} r
+    USING lm_rollup_keys k
+    WHERE EQUAL_NULL(r.CLOSER_ID, k.CLOSER_ID)
+    AND EQUAL_NULL(r.CHANNEL, k.CHANNEL)
+    AND r.WEEK_START = k.WEEK_START
+    """,
+    f"""
+    INSERT INTO {ROLLUP_TABLE} (CLOSER_ID, CHANNEL, WEEK_START, APPOINTMENTS, UPDATED_AT)
+    SELECT w.CLOSER_ID, w.CHANNEL, w.WEEK_START, COUNT(*), CURRENT_TIMESTAMP
+    FROM {OPPORTUNITY_WEEKS_TABLE} w
+    JOIN lm_rollup_keys k
+        ON EQUAL_NULL(w.CLOSER_ID, k.CLOSER_ID)
+        AND EQUAL_NULL(w.CHANNEL, k.CHANNEL)
+        AND w.WEEK_START = k.WEEK_START
+    GROUP BY w.CLOSER_ID, w.CHANNEL, w.WEEK_START
+    """,
+]
+
+
+# Fold every opportunity modified since the last run into the rollup.
+# The first run on empty tables backfills the whole history. Until the
+# Salesforce high-water mark moves past the rollup's, a run is just the two
+# metadata reads: no staging tables and no DML, so the warehouse stays
+# suspended. Returns whether anything was folded in.
+def refresh_rollup(tag="rollup_refresh"):
+    with _refresh_lock, pooled_session(tag) as session:
+        for statement in CREATE_TABLES:
+            collect(session, statement, tag)
+        source = collect(session, SOURCE_HIGH_WATER, tag)[0][0]
+        counted = collect(session, ROLLUP_HIGH_WATER, tag)[0][0]
+        if source is None or (counted is not None and source <= counted):
+            return False
+
+        for statement in [STAGE_CHANGES, STAGE_KEYS]:
+            collect(session, statement, tag)
+
+        collect(session, "BEGIN", tag)
+        try:
+            for statement in APPLY_CHANGES:
+                collect(session, statement, tag)
+            collect(session, "COMMIT", tag)
+        except Exception:
+            collect(session, "ROLLBACK", tag)
+            raise
+        return True
+
+
+# Refresh at most once per REFRESH_TTL across every viewer of the app. A
+# failed refresh is cached too, so the boards keep serving the last rollup
+# instead of retrying on every rerun.
+@st.cache_data(ttl=REFRESH_TTL, show_spinner=False)
+def ensure_rollup_fresh():
+    try:
+        refresh_rollup()
+        return True
+    except Exception as e:
+        print(f"Appointment rollup refresh failed: {e}")
+        return False
+
+
+# Appointments per closer, sales channel and timeframe, read from the rollup.
+# Expects a `weeks` CTE from components.timeframes.week_dimension_sql().
+def appointments_by_week_sql(sales_channels):
+    channels = ", ".join(quote(channel) for channel in sales_channels)
+    return f"""
+        SELECT r.CLOSER_ID, r.CHANNEL, w.TIMEFRAME, SUM(r.APPOINTMENTS) APPOINTMENTS
+        FROM {ROLLUP_TABLE} r
+        JOIN weeks w ON r.WEEK_START = w.WEEK_START
+        WHERE r.CHANNEL IN ({channels})
+        GROUP BY r.CLOSER_ID, r.CHANNEL, w.TIMEFRAME
+    """
+
+
+if __name__ == "__main__":
+    refresh_rollup()
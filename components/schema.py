@@ -0,0 +1,127 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Column types applied once, on the Arrow batches Snowflake returns, before
+# anything reaches pandas. Each column maps to (kind, fill):
+#
+#   'category'  dictionary-encoded; becomes a pandas Categorical
+#   'string'    plain text
+#   'int16'     compact integer; needs a fill so pandas keeps it non-nullable
+#   'Int16'     nullable compact integer
+#   'int32'     compact integer for counts
+#   'yes_no'    'Yes'/'No' text (any case, padded) read as a boolean
+#   'bool'      boolean
+#
+# `fill` replaces NULLs and may be None.
+DEFAULT_PROFILE_PICTURE = 'https://i.ibb.co/ZNK5xmN/pdycc8-1-removebg-preview.png'
+
+APPOINTMENTS_SCHEMA = {
+    'ROW_ID': ('string', None),
+    'CLOSER_ID': ('string', None),
+    'NAME': ('string', None),
+    'GOAL': ('int16', 0),
+    'RANK': ('int16', 100),
+    'FM_GOAL': ('int16', 0),
+    'FM_RANK': ('int16', 100),
+    'ACTIVE': ('yes_no', False),
+    'TYPE': ('category', '🏠🏃 Hybrid'),
+    'MARKET': ('category', 'No Market'),
+    'PROFILE_PICTURE': ('string', DEFAULT_PROFILE_PICTURE),
+    'CLOSER_NOTES': ('string', None),
+    'IS_DELETED': ('bool', False),
+}
+
+# The market editor accepts free text and new rows, so its text columns stay
+# plain strings; categoricals would reject values they haven't seen.
+MARKETS_SCHEMA = {
+    'MARKET': ('string', None),
+    'MARKET_GROUP': ('string', None),
+    'RANK': ('Int16', None),
+    'NOTES': ('string', None),
+}
+
+# Closer goals joined to the appointment rollup, as read by the boards
+BOARD_SCHEMA = {
+    'CHANNEL': ('category', None),
+    'MARKET_GROUP': ('category', 'No Group'),
+    'MARKET_RANK': ('Int16', None),
+    'NOTES': ('string', None),
+    'GOAL': ('int16', 0),
+    'MARKET': ('category', None),
+    'TYPE': ('category', None),
+    'RANK': ('int16', 100),
+    'ACTIVE': ('category', None),
+    'CLOSER_ID': ('string', None),
+    'PROFILE_PICTURE': ('string', DEFAULT_PROFILE_PICTURE),
+    'NAME': ('string', None),
+    'TIMEFRAME': ('category', 'This Week'),
+    'APPOINTMENTS': ('int32', 0),
+    'PERCENTAGE_TO_GOAL': ('float64', 100.0),
+}
+
+_ARROW_TYPES = {
+    'category': pa.string(),
+    'string': pa.string(),
+    'int16': pa.int16(),
+    'Int16': pa.int16(),
+    'int32': pa.int32(),
+    'float64': pa.float64(),
+    'bool': pa.bool_(),
+}
+
+
+def _cast_column(array, kind, fill):
+    if kind == 'yes_no':
+        text = pc.utf8_lower(pc.utf8_trim_whitespace(pc.cast(array, pa.string())))
+        array = pc.equal(text, 'yes')
+        arrow_type = pa.bool_()
+    else:
+        arrow_type = _ARROW_TYPES[kind]
+        array = pc.cast(array, arrow_type)
+    if fill is not None:
+        array = pc.fill_null(array, pa.scalar(fill, arrow_type))
+    if kind == 'category':
+        array = pc.dictionary_encode(array)
+    return array
+
+
+# Cast an Arrow table to `schema` and convert it to pandas in one pass.
+# Columns the schema doesn't mention are passed through untouched.
+def arrow_to_frame(table, schema):
+    columns = []
+    for name in table.column_names:
+        array = table.column(name)
+        if name in schema:
+            array = _cast_column(array, *schema[name])
+        columns.append(array)
+    df = pa.table(columns, names=table.column_names).to_pandas()
+
+    for name, (kind, _) in schema.items():
+        if kind == 'Int16' and name in df.columns:
+            df[name] = df[name].astype('Int16')
+    return df
+
+
+# Cast a pandas frame holding raw column values (as Snowflake stores them)
+# to `schema`, the same way a query result would be
+def typed_frame(df, schema):
+    return arrow_to_frame(pa.Table.from_pandas(df, preserve_index=False), schema)
+
+
+# Concatenate frames of the same schema, keeping categorical columns
+# categorical (pd.concat falls back to object when categories differ).
+# Categories are cast to the first frame's dtype first: an all-missing or
+# freshly built column can carry object categories next to str ones.
+def concat_typed(frames):
+    frames = [f for f in frames if f is not None]
+    first = frames[0]
+    for name in first.columns:
+        if isinstance(first[name].dtype, pd.CategoricalDtype):
+            dtype = first[name].cat.categories.dtype
+            parts = [f[name].astype('category') for f in frames]
+            categories = pd.api.types.union_categoricals(
+                [part.cat.set_categories(part.cat.categories.astype(dtype)) for part in parts], ignore_order=True
+            ).categories
+            frames = [f.assign(**{name: f[name].cat.set_categories(categories)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
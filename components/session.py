@@ -0,0 +1,283 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import streamlit as st
+from snowflake.snowpark import Session
+from snowflake.snowpark.context import get_active_session
+
+from components.metrics import record_query
+from components.schema import arrow_to_frame
+
+# Shared Snowflake sessions for every page of the app. Sessions are created
+# lazily up to POOL_SIZE, handed out one caller at a time and put back after
+# use, so a rerun only pays for a login when the pool has nothing idle.
+POOL_SIZE = 4
+CHECKOUT_TIMEOUT = 30           # seconds to wait for a free session
+HEALTH_CHECK_AFTER = 300        # ping sessions that sat idle longer than this
+MAX_SESSION_AGE = 3 * 60 * 60   # recycle before the 4h login token expires
+QUERY_TAG_PREFIX = "lead_management"
+
+
+def full_query_tag(tag=None):
+    return f"{QUERY_TAG_PREFIX}:{tag}" if tag else QUERY_TAG_PREFIX
+
+
+def create_snowflake_session():
+    connection_parameters = {
+        "account": st.secrets["snowflake"]["account"],
+        "user": st.secrets["snowflake"]["user"],
+        "password": st.secrets["snowflake"]["password"],
+        "role": st.secrets["snowflake"]["role"],
+        "warehouse": st.secrets["snowflake"]["warehouse"],
+        "database": st.secrets["snowflake"]["database"],
+        "schema": st.secrets["snowflake"]["schema"],
+    }
+    return Session.builder.configs(connection_parameters).create()
+
+
+class SessionPool:
+    def __init__(self, factory, size=POOL_SIZE, closeable=True):
+        self._factory = factory
+        self._size = size
+        self._closeable = closeable
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open_count = 0
+        # id(session) -> [created_at, last_used_at, query_tag]
+        self._meta = {}
+
+    def acquire(self, tag=None, timeout=CHECKOUT_TIMEOUT):
+        session = self._checkout(timeout)
+        if not self._is_healthy(session):
+            # The replacement takes over the discarded session's slot
+            self._discard(session, keep_slot=True)
+            session = self._open()
+        try:
+            self._tag(session, tag)
+        except Exception:
+            self._discard(session)
+            raise
+        return session
+
+    def release(self, session):
+        meta = self._meta.get(id(session))
+        if meta is not None:
+            meta[1] = time.monotonic()
+        self._idle.put(session)
+
+    def close(self):
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(session)
+
+    def _checkout(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        # Reserve the slot under the same lock that checks it, so concurrent
+        # callers can't open more than `size` sessions between them
+        with self._lock:
+            reserved = self._open_count < self._size
+            if reserved:
+                self._open_count += 1
+        if reserved:
+            return self._open()
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No Snowflake session became free within {timeout}s")
+
+    # Create a session for a slot already counted in _open_count; the slot
+    # is given back if the factory fails
+    def _open(self):
+        try:
+            session = self._factory()
+        except Exception:
+            with self._lock:
+                self._open_count -= 1
+            raise
+        now = time.monotonic()
+        self._meta[id(session)] = [now, now, None]
+        return session
+
+    def _discard(self, session, keep_slot=False):
+        self._meta.pop(id(session), None)
+        if not keep_slot:
+            with self._lock:
+                self._open_count -= 1
+        if self._closeable:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, session):
+        created_at, last_used_at, _ = self._meta.get(id(session), (0, 0, None))
+        now = time.monotonic()
+        if self._closeable and now - created_at > MAX_SESSION_AGE:
+            return False
+        if now - last_used_at > HEALTH_CHECK_AFTER:
+            try:
+                session.sql("SELECT 1").collect()
+            except Exception:
+                return False
+        return True
+
+    def _tag(self, session, tag):
+        # ALTER SESSION is a round-trip, so only send it when the tag changes.
+        meta = self._meta.get(id(session))
+        full_tag = full_query_tag(tag)
+        if meta is None or meta[2] == full_tag:
+            return
+        session.query_tag = full_tag
+        meta[2] = full_tag
+
+
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    # Inside Snowflake-hosted Streamlit there is exactly one session and we
+    # don't own it, so hand it out one caller at a time and never close it.
+    try:
+        active = get_active_session()
+        print("Got active session")
+        return SessionPool(lambda: active, size=1, closeable=False)
+    except Exception:
+        return SessionPool(create_snowflake_session)
+
+
+@contextmanager
+def pooled_session(tag=None):
+    pool = get_pool()
+    session = pool.acquire(tag)
+    try:
+        yield session
+    finally:
+        pool.release(session)
+
+
+# Coalesces identical reads that are in flight at the same time: the first
+# caller runs the query and everyone who asks for the same key while it runs
+# waits on its result instead of sending a duplicate to the warehouse.
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counts = {'executed': 0, 'coalesced': 0}
+
+    # Returns (result, coalesced)
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._counts['executed'] += 1
+            else:
+                self._counts['coalesced'] += 1
+
+        if not leader:
+            # Followers get their own copy so nobody mutates a shared frame
+            return future.result().copy(), True
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+@st.cache_resource(show_spinner=False)
+def get_single_flight():
+    return SingleFlight()
+
+
+# How many reads ran and how many were served by a read already in flight
+def single_flight_counts():
+    return get_single_flight().counts()
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(index=False).sum())
+
+
+def _coalesced_read(key, fn, tag):
+    start = time.perf_counter()
+    df, coalesced = get_single_flight().do(key, fn)
+    if coalesced:
+        record_query(tag, full_query_tag(tag), time.perf_counter() - start, len(df), _frame_bytes(df), cache='coalesced')
+    return df
+
+
+# Run a query and return a pandas DataFrame. `params` are bound to the ?
+# placeholders in `sql`.
+def query_df(sql, tag=None, params=None):
+    key = ('df', sql, tuple(params or ()))
+    return _coalesced_read(key, lambda: _query_df(sql, tag, params), tag)
+
+
+def _query_df(sql, tag, params):
+    with pooled_session(tag) as session:
+        start = time.perf_counter()
+        df = session.sql(sql, params=params).to_pandas()
+        record_query(tag, full_query_tag(tag), time.perf_counter() - start, len(df), _frame_bytes(df))
+        return df
+
+
+# Run a query through the connector's Arrow fetch and return a pandas
+# DataFrame cast to `schema` (see components.schema) in one pass
+def query_typed(sql, schema, tag=None, params=None):
+    key = ('typed', sql, tuple(schema.items()), tuple(params or ()))
+    return _coalesced_read(key, lambda: _query_typed(sql, schema, tag, params), tag)
+
+
+# Only the round-trip and Arrow fetch count as query time; the cast to
+# pandas after it is the app's own work
+def _query_typed(sql, schema, tag, params):
+    with pooled_session(tag) as session:
+        start = time.perf_counter()
+        # Snowpark opens its connection with the qmark paramstyle, so these
+        # are bound server-side
+        cursor = session.connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            # An empty result still comes back as a table typed from the
+            # result metadata, so it gets the schema's dtypes like any other
+            table = cursor.fetch_arrow_all(force_return_table=True)
+        finally:
+            cursor.close()
+        record_query(tag, full_query_tag(tag), time.perf_counter() - start, table.num_rows, table.nbytes)
+
+    return arrow_to_frame(table, schema)
+
+
+# Run a statement on a session that is already checked out and return the
+# collected rows; for callers that need several statements on one session
+def collect(session, sql, tag=None, params=None):
+    start = time.perf_counter()
+    rows = session.sql(sql, params=params).collect()
+    record_query(tag, full_query_tag(tag), time.perf_counter() - start, len(rows), None)
+    return rows
+
+
+# Run a statement and return the collected rows
+def execute(sql, tag=None, params=None):
+    with pooled_session(tag) as session:
+        return collect(session, sql, tag, params)
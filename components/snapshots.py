@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from components.metrics import record_cache
+
+# Last known results of the app's queries, kept on disk as Parquet so a
+# freshly started server can paint from them while Snowflake (and its
+# warehouse) catches up in the background.
+SNAPSHOT_DIR = Path(os.environ.get("LM_SNAPSHOT_DIR", ".cache/snapshots"))
+
+
+def _paths(name):
+    return SNAPSHOT_DIR / f"{name}.parquet", SNAPSHOT_DIR / f"{name}.json"
+
+
+def save_snapshot(name, df, **metadata):
+    data_path, meta_path = _paths(name)
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    metadata = {'saved_at': time.time(), 'rows': len(df), **metadata}
+
+    # Write to temporary files and rename so readers never see half a file.
+    # Each writer gets its own temporary files: a foreground load and a
+    # background refresh (or two processes sharing the directory) can save
+    # the same name at once.
+    data_tmp = _temporary(data_path)
+    meta_tmp = _temporary(meta_path)
+    try:
+        df.to_parquet(data_tmp, index=False)
+        meta_tmp.write_text(json.dumps(metadata, default=str))
+        os.replace(data_tmp, data_path)
+        os.replace(meta_tmp, meta_path)
+    finally:
+        data_tmp.unlink(missing_ok=True)
+        meta_tmp.unlink(missing_ok=True)
+
+
+def _temporary(path):
+    with tempfile.NamedTemporaryFile(dir=SNAPSHOT_DIR, prefix=f"{path.name}.", suffix='.tmp', delete=False) as f:
+        return Path(f.name)
+
+
+# Returns (df, metadata), or (None, None) when there is no usable snapshot
+def load_snapshot(name):
+    data_path, meta_path = _paths(name)
+    try:
+        metadata = json.loads(meta_path.read_text())
+        return pd.read_parquet(data_path), metadata
+    except Exception:
+        return None, None
+
+
+class SnapshotCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}      # name -> {'df', 'version', 'fetched_at'}
+        self._refreshing = set()
+
+    # Return the frame for `name`, calling `loader` only when needed.
+    #
+    # A cold process serves the disk snapshot and refreshes it in the
+    # background; a changed `version` means our own write made the data
+    # stale, so that load happens inline. Entries older than `max_age`
+    # seconds are served as-is while a background refresh runs.
+    def get(self, name, loader, version=None, max_age=None):
+        return self.get_with_time(name, loader, version, max_age)[0]
+
+    # get(), plus when the returned frame was fetched (epoch seconds), read
+    # from the same entry
+    def get_with_time(self, name, loader, version=None, max_age=None):
+        with self._lock:
+            entry = self._entries.get(name)
+
+        if entry is not None and entry['version'] == version:
+            if max_age is not None and time.time() - entry['fetched_at'] > max_age:
+                self._refresh_async(name, loader, version)
+            record_cache(f"snapshot:{name}", hit=True)
+            return entry['df'].copy(), entry['fetched_at']
+
+        if entry is None:
+            df, metadata = load_snapshot(name)
+            if df is not None:
+                with self._lock:
+                    self._entries[name] = {'df': df, 'version': version, 'fetched_at': metadata['saved_at']}
+                self._refresh_async(name, loader, version)
+                record_cache(f"snapshot:{name}", hit=True)
+                return df.copy(), metadata['saved_at']
+
+        record_cache(f"snapshot:{name}", hit=False)
+        df = loader()
+        fetched_at = self._store(name, df, version)
+        return df.copy(), fetched_at
+
+    # Returns the entry's fetch time, or None when a background load was dropped
+    def _store(self, name, df, version, background=False):
+        with self._lock:
+            current = self._entries.get(name)
+            # Don't let a slow background load overwrite data from a newer version
+            if background and current is not None and current['version'] != version:
+                return None
+            fetched_at = time.time()
+            self._entries[name] = {'df': df, 'version': version, 'fetched_at': fetched_at}
+        try:
+            save_snapshot(name, df, version=version)
+        except Exception as e:
+            print(f"Could not write snapshot '{name}': {e}")
+        return fetched_at
+
+    def _refresh_async(self, name, loader, version):
+        with self._lock:
+            if name in self._refreshing:
+                return
+            self._refreshing.add(name)
+
+        def refresh():
+            try:
+                self._store(name, loader(), version, background=True)
+            except Exception as e:
+                print(f"Background refresh of '{name}' failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(name)
+
+        threading.Thread(target=refresh, name=f"snapshot-{name}", daemon=True).start()
+
+
+@st.cache_resource(show_spinner=False)
+def get_snapshot_cache():
+    return SnapshotCache()
+
+
+def cached_snapshot(name, loader, version=None, max_age=None):
+    return get_snapshot_cache().get(name, loader, version, max_age)
@@ -0,0 +1,44 @@
+import json
+import math
+
+
+# Render a Python value as a Snowflake SQL literal
+def quote(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+# Comma-separated ? placeholders for `count` bind parameters
+def placeholders(count):
+    return ", ".join("?" * count)
+
+
+# Source rows for a bulk write, read from one JSON array bound to a single ?.
+# The statement text depends only on `columns` ((name, Snowflake type)
+# pairs), never on the data or the number of rows, so Snowflake compiles it
+# once; pair it with json_rows().
+def json_rows_source(columns):
+    selects = ",\n            ".join(f"f.value:{name}::{sql_type} AS {name}" for name, sql_type in columns)
+    return f"""SELECT
+            {selects}
+        FROM TABLE(FLATTEN(INPUT => PARSE_JSON(?))) f"""
+
+
+def _json_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()  # numpy scalars
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+# The bind value for json_rows_source(): rows of values in `names` order
+def json_rows(rows, names):
+    return json.dumps([{name: _json_value(value) for name, value in zip(names, row)} for row in rows])
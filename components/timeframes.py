@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+# Week offsets from the current ISO week for each dashboard timeframe
+TIMEFRAMES = {
+    'Last Week': -1,
+    'This Week': 0,
+    'Next Week': 1,
+}
+
+
+# Monday of the ISO week `day` falls in (today, by local server time, as
+# the refreshers use). This is the week key the board queries bind, so their
+# text and parameters stay identical all week and Snowflake can answer
+# repeats from its result cache instead of resuming the warehouse.
+def current_week_start(day=None):
+    day = day or date.today()
+    return day - timedelta(days=day.weekday())
+
+
+# A small calendar of (TIMEFRAME, WEEK_START, WEEK_END) rows, one per
+# timeframe. Binds one parameter, the week key from current_week_start().
+def week_dimension_sql():
+    offsets = ", ".join(f"('{name}', {offset})" for name, offset in TIMEFRAMES.items())
+    return f"""SELECT
+            t.TIMEFRAME,
+            DATEADD(week, t.WEEK_OFFSET, k.WEEK_START) AS WEEK_START,
+            DATEADD(week, t.WEEK_OFFSET + 1, k.WEEK_START) AS WEEK_END
+        FROM (SELECT TO_DATE(?) AS WEEK_START) k
+        CROSS JOIN (VALUES {offsets}) AS t(TIMEFRAME, WEEK_OFFSET)"""
@@ -0,0 +1,61 @@
+import pandas as pd
+import streamlit as st
+
+from components.schema import DEFAULT_PROFILE_PICTURE
+from components.session import query_df
+from components.snapshots import get_snapshot_cache
+
+# Name, Salesforce ID and picture of every current team member, in one read
+USERS_QUERY = """
+    SELECT "user.name" FULL_NAME, "team_members.user_id" SALESFORCE_ID, "user.picture_link" PROFILE_PICTURE
+    FROM operational.salesforce.vw_team_members_flattened
+    WHERE "user.term_date" IS NULL
+"""
+
+
+def _picture(link):
+    if pd.isna(link) or str(link).strip() == '':
+        return DEFAULT_PROFILE_PICTURE
+    return link
+
+
+# The team member directory with lookups by name and by Salesforce ID.
+# A name that appears more than once resolves to its first row.
+class UserDirectory:
+    def __init__(self, df):
+        self.frame = df
+        first = df.dropna(subset=['FULL_NAME']).drop_duplicates('FULL_NAME')
+        self.names = sorted(first['FULL_NAME'])
+        self._ids = dict(zip(first['FULL_NAME'], first['SALESFORCE_ID']))
+        self._pictures = dict(zip(first['FULL_NAME'], first['PROFILE_PICTURE'].map(_picture)))
+        by_id = df.dropna(subset=['SALESFORCE_ID']).drop_duplicates('SALESFORCE_ID')
+        self._names_by_id = dict(zip(by_id['SALESFORCE_ID'], by_id['FULL_NAME']))
+
+    def salesforce_id(self, name):
+        return self._ids.get(name)
+
+    def picture(self, name):
+        return self._pictures.get(name, DEFAULT_PROFILE_PICTURE)
+
+    def name(self, salesforce_id):
+        return self._names_by_id.get(salesforce_id)
+
+
+# Team members come and go without any write from this app (there is no
+# version to bump), so the frame is reloaded in the background once it is
+# older than this many seconds
+DIRECTORY_MAX_AGE = 15 * 60
+
+
+# Built once per fetched frame: a cold start's disk snapshot is replaced
+# as soon as its background refresh lands
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _user_directory(fetched_at, _df):
+    return UserDirectory(_df)
+
+
+def get_user_directory(tag=None):
+    df, fetched_at = get_snapshot_cache().get_with_time(
+        'user_directory', lambda: query_df(USERS_QUERY, tag=tag), max_age=DIRECTORY_MAX_AGE,
+    )
+    return _user_directory(fetched_at, df)
@@ -0,0 +1,31 @@
+import threading
+
+import streamlit as st
+
+# Per-table data versions for cache invalidation.
+#
+# Cached readers take the versions of the tables they read as arguments, so
+# a write only has to bump its own table: readers of that table miss on the
+# next rerun and every other cached query in the process stays warm.
+TABLES = ('appointments', 'markets', 'users')
+
+
+@st.cache_resource(show_spinner=False)
+def _registry():
+    return {'lock': threading.Lock(), 'versions': {table: 0 for table in TABLES}}
+
+
+def version(table):
+    return _registry()['versions'][table]
+
+
+def versions(*tables):
+    registry = _registry()
+    return tuple(registry['versions'][table] for table in tables)
+
+
+def bump(*tables):
+    registry = _registry()
+    with registry['lock']:
+        for table in tables:
+            registry['versions'][table] += 1
@@ -0,0 +1,106 @@
+import pandas as pd
+import streamlit as st
+
+from components.metrics import get_metrics
+from components.query_history import result_cache_stats
+from components.session import single_flight_counts
+
+st.set_page_config(
+    page_title="Diagnostics",
+    layout="wide",
+    initial_sidebar_state="collapsed"
+)
+
+
+# Admins are listed by email under `admins` in the app's secrets
+def is_admin():
+    user = st.user if hasattr(st, 'user') else st.experimental_user
+    try:
+        admins = st.secrets.get("admins", [])
+    except Exception:
+        return False
+    return user.get("email") in admins
+
+
+if not is_admin():
+    st.error("ⓘ This page is for admins only.")
+    st.stop()
+
+
+def p95(series):
+    return series.quantile(0.95)
+
+
+queries, caches, reruns = (pd.DataFrame(records) for records in get_metrics().snapshot())
+
+st.write("## 🩺 Diagnostics")
+st.caption("Timings for this server process, newest last. Query time is the Snowflake round-trip and fetch; 'other' is the rest of the rerun, mostly pandas.")
+
+counts = single_flight_counts()
+col1, col2, col3 = st.columns(3)
+col1.metric("Reads executed", counts['executed'])
+col2.metric("Reads coalesced", counts['coalesced'])
+col3.metric("Cache hit rate", f"{caches['hit'].mean():.0%}" if not caches.empty else "–")
+
+st.write("### Reruns")
+if reruns.empty:
+    st.info("No reruns recorded yet.")
+else:
+    st.dataframe(
+        reruns.groupby('page').agg(
+            reruns=('wall_seconds', 'size'),
+            wall_mean=('wall_seconds', 'mean'),
+            wall_p95=('wall_seconds', p95),
+            query_mean=('query_seconds', 'mean'),
+            render_mean=('render_seconds', 'mean'),
+            other_mean=('other_seconds', 'mean'),
+            queries_mean=('queries', 'mean'),
+        ).round(3),
+        use_container_width=True,
+    )
+
+st.write("### Queries")
+if queries.empty:
+    st.info("No queries recorded yet.")
+else:
+    st.dataframe(
+        queries.groupby(['label', 'query_tag', 'cache'], dropna=False).agg(
+            calls=('seconds', 'size'),
+            seconds_p50=('seconds', 'median'),
+            seconds_p95=('seconds', p95),
+            seconds_total=('seconds', 'sum'),
+            rows=('rows', 'sum'),
+            bytes=('bytes', 'sum'),
+        ).round(3),
+        use_container_width=True,
+    )
+    with st.expander("Recent queries"):
+        recent = queries.assign(at=pd.to_datetime(queries['at'], unit='s'))
+        st.dataframe(recent.iloc[::-1], hide_index=True, use_container_width=True)
+
+st.write("### Caches")
+if caches.empty:
+    st.info("No cache reads recorded yet.")
+else:
+    st.dataframe(
+        caches.groupby('cache').agg(reads=('hit', 'size'), hit_rate=('hit', 'mean')).round(3),
+        use_container_width=True,
+    )
+
+st.write("### Snowflake result cache")
+st.caption(
+    "SELECTs by this app over the last 24 hours, from Snowflake's query history. A hit is a query that scanned no bytes, so the warehouse stayed idle. "
+    "Not counted here: the appointment rollup refresh (tag 'rollup_refresh'), whose staging tables and MERGE/DELETE/INSERT resume the warehouse. "
+    "It only runs them once Salesforce has opportunity changes newer than the rollup; otherwise it is two metadata reads."
+)
+try:
+    result_cache = result_cache_stats()
+except Exception as e:
+    st.warning(f"Could not read query history: {e}")
+else:
+    if result_cache.empty:
+        st.info("No queries in the query history yet.")
+    else:
+        total = result_cache['QUERIES'].sum()
+        st.metric("Result cache hit rate", f"{result_cache['RESULT_CACHE_HITS'].sum() / total:.0%}")
+        st.dataframe(result_cache.round(3), hide_index=True, use_container_width=True)
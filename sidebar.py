@@ -24,6 +24,9 @@ def sidebar():
             st.Page("pages/1_Web_Appointments.py", title="🌐 Web"),
             st.Page("pages/2_FM_Appointments.py", title="🚪 Field"),
         ],
+        "Admin": [
+            st.Page("pages/3_Diagnostics.py", title="🩺 Diagnostics"),
+        ],
     }
 
     pg = st.navigation(pages)